@@ -1,19 +1,31 @@
 """命令行入口：按 CVE 记录筛选符合条件的 Maven 仓库。"""
 
 import argparse
-import json
-import logging
 import os
-import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from collections import defaultdict
 
-from src.builder import clone_repo_with_retry as clone_repo, build_repo_only
-from src.detector import detect_usage
-from src.github_search import GitHubSearcher
-from src.maven import resolve_dependency_version, parse_version_spec, generate_candidate_versions, version_satisfies
-from src.parser import load_vuln_records
-from src.utils import ensure_dir, write_jsonl, setup_logger, append_jsonl
+from src.builder import (
+    build_repo_only,
+    copy_repo_tree,
+    RepoStore,
+    full_checkout,
+    sparse_checkout,
+    SOURCE_SPARSE_PATTERNS,
+    MAX_REPO_SIZE_MB,
+)
+from src.detector import detect_usage_batch, set_parse_workers, shutdown_parse_pool
+from src.github_search import GitHubSearcher, search_many
+from src.maven import (
+    resolve_dependency_version,
+    parse_version_spec,
+    version_satisfies,
+    probe_remote_pom,
+    collect_pom_paths,
+)
+from src.parser import iter_vuln_records
+from src.utils import ensure_dir, setup_logger, JsonlWriter
 from src.intermediate import IntermediateCache
 from src.log_utils import logger
 
@@ -26,41 +38,303 @@ def parse_library_coords(cve_library: str):
     return {"groupId": group_id, "artifactId": artifact_id}
 
 
+def library_cache_key(library_name):
+    """生成 Library 级别搜索结果的缓存键。"""
+    return f"LIBRARY_{library_name.replace('/', '__')}"
+
+
+def build_library_query(group_id):
+    """构造 Library 对应的 GitHub 代码搜索查询。"""
+    return f"{group_id}+filename:pom.xml"
+
+
+def presearch_libraries(library_groups, tokens, args, cache):
+    """在处理 Library 组前，使用多个 token 批量完成未缓存的搜索并写入缓存。"""
+    queries = {}
+    for library_name in library_groups:
+        coords = parse_library_coords(library_name)
+        if not coords:
+            continue
+        cache_key = library_cache_key(library_name)
+        if cache.has_search_results(cache_key):
+            continue
+        queries[cache_key] = build_library_query(coords["groupId"])
+
+    if not queries:
+        return
+    logger.info("批量搜索 %s 个 Library，使用 %s 个 token", len(queries), len(tokens) or 1, indent=0)
+    for cache_key, repos in search_many(queries, tokens, max_repos=args.topk).items():
+        cache.save_search_results(cache_key, repos)
+
+
 def group_records_by_library(records):
-    """将 CVE 记录按 CVE_Library 分组。"""
+    """将 CVE 记录按 CVE_Library 分组，边读取边分组，返回 (分组, 记录总数, (最大 Library, 其 CVE 数))。"""
     library_groups = defaultdict(list)
+    total = 0
+    max_library, max_count = None, 0
     for record in records:
+        total += 1
         cve_library = record.get("CVE_Library", "")
         if cve_library:
-            library_groups[cve_library].append(record)
-    return dict(library_groups)
+            group = library_groups[cve_library]
+            group.append(record)
+            if len(group) > max_count:
+                max_library, max_count = cve_library, len(group)
+    return dict(library_groups), total, (max_library, max_count)
 
 
-def copy_repository_to_cve_dirs(repo_full_name, temp_clone_dir, cve_numbers, args):
-    """将临时克隆的仓库复制到所有相关 CVE 的目录中。"""
+def copy_repository_to_cve_dirs(repo_full_name, clone_dir, cve_numbers, args):
+    """将共享存储中的仓库复制到相关 CVE 的目录中（reflink/硬链接，避免重复占用磁盘）。"""
     copied_dirs = {}
     for cve_number in cve_numbers:
         cve_clone_dir = os.path.join(args.workdir, cve_number, repo_full_name.replace("/", "__"))
         # 确保目标目录存在
-        os.makedirs(os.path.dirname(cve_clone_dir), exist_ok=True)
-        # 如果目标目录已存在，先删除
-        if os.path.exists(cve_clone_dir):
-            shutil.rmtree(cve_clone_dir)
-        # 复制仓库
-        shutil.copytree(temp_clone_dir, cve_clone_dir)
+        ensure_dir(os.path.dirname(cve_clone_dir))
+        # 复制仓库（已存在的目标目录由 copy_repo_tree 先删除）
+        method = copy_repo_tree(clone_dir, cve_clone_dir)
         copied_dirs[cve_number] = cve_clone_dir
-        logger.info(f"已复制仓库到 {cve_number} 目录", indent=3)
+        logger.info("已复制仓库到 %s 目录（%s）", cve_number, method, indent=3)
     return copied_dirs
 
 
-def process_library_group(library_name, cve_records, searcher, args, cache, output_path):
+def reject_repo(cache, cve_number, repo_full, args, delete_reason):
+    """记录仓库对某个 CVE 不满足条件，并清理对应目录。"""
+    cache.mark_repo_deleted(cve_number, repo_full, args.workdir, delete_reason)
+    logger.info("跳过仓库 %s: %s", repo_full, delete_reason, indent=3)
+
+
+def repo_needs_processing(repo_full, cve_numbers, cache):
+    """判断仓库是否仍有 CVE 尚未得到最终处理结果。"""
+    for cve_number in cve_numbers:
+        status = cache.load_clone_status(cve_number, repo_full)
+        if not status or status.get("status") not in ["kept", "deleted", "failed"]:
+            return True
+    return False
+
+
+def pending_cve_records(repo_full, cve_records, cache):
+    """返回尚未对该仓库得出最终结果的 CVE 记录。"""
+    pending = []
+    for record in cve_records:
+        status = cache.load_clone_status(record.get("CVE_Number", "UNKNOWN"), repo_full)
+        if not status or status.get("status") not in ["kept", "deleted", "failed"]:
+            pending.append(record)
+    return pending
+
+
+def reject_oversized_repos(repos, cve_records, store, args, cache):
+    """克隆前根据搜索结果中的 size 字段（KB）拒绝过大的仓库。"""
+    for repo in repos:
+        size_kb = repo.get("size")
+        # 搜索结果缺少 size 时无法预判，交给克隆后的检查
+        if not isinstance(size_kb, int):
+            continue
+        repo_full = repo["full_name"]
+        if size_kb / 1024 <= MAX_REPO_SIZE_MB or os.path.exists(store.path(repo_full)):
+            continue
+        for record in pending_cve_records(repo_full, cve_records, cache):
+            reject_repo(cache, record.get("CVE_Number", "UNKNOWN"), repo_full, args, f"仓库过大（克隆前检查，{size_kb // 1024} MB）")
+
+
+def prefilter_by_remote_pom(repos, cve_records, group_id, artifact_id, store, args, cache):
+    """克隆前用远程根 pom 预检版本，所有待处理 CVE 都不匹配的仓库直接跳过克隆。"""
+    cve_numbers = [record.get("CVE_Number", "UNKNOWN") for record in cve_records]
+    # 已在共享存储中的仓库无需预检，克隆后的本地解析更准确
+    candidates = [
+        repo for repo in repos
+        if repo_needs_processing(repo["full_name"], cve_numbers, cache) and not os.path.exists(store.path(repo["full_name"]))
+    ]
+    if not candidates:
+        return
+    with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+        probes = list(executor.map(lambda repo: probe_remote_pom(repo["full_name"], group_id, artifact_id), candidates))
+
+    for repo, dep_info in zip(candidates, probes):
+        if not dep_info:
+            continue
+        repo_full = repo["full_name"]
+        pending_records = pending_cve_records(repo_full, cve_records, cache)
+        resolved_version = dep_info["resolved_version"]
+        if any(version_satisfies(resolved_version, parse_version_spec(record.get("CVE_Library_version", ""))) for record in pending_records):
+            continue
+        for record in pending_records:
+            reject_repo(cache, record.get("CVE_Number", "UNKNOWN"), repo_full, args, f"版本不匹配: {dep_info['reason']}")
+
+
+def preclone_repos(repos, cve_numbers, store, args, cache):
+    """并行克隆一批仍需处理的仓库到共享存储。"""
+    pending = [repo for repo in repos if repo_needs_processing(repo["full_name"], cve_numbers, cache)]
+    if not pending:
+        return {}
+    return store.clone_many(
+        [(repo["full_name"], repo["html_url"]) for repo in pending],
+        timeout=args.timeout,
+        concurrency=args.clone_concurrency,
+    )
+
+
+def process_repo(repo, clone_infos, cve_records, library_name, group_id, artifact_id, store, args, cache, writer):
+    """针对一个 Library 组验证单个候选仓库，并输出满足条件的 CVE 匹配结果。"""
+    repo_full = repo["full_name"]
+    repo_url = repo["html_url"]
+
+    logger.info("预处理仓库: %s", repo_full, indent=2)
+    # 共享存储中的仓库工作区
+    clone_dir = store.path(repo_full)
+
+    # 筛选仍需验证该仓库的 CVE
+    pending_records = []
+    for record in cve_records:
+        cve_number = record.get("CVE_Number", "UNKNOWN")
+        # 检查是否已经处理过这个仓库（针对这个 CVE）
+        existing_status = cache.load_clone_status(cve_number, repo_full)
+        if existing_status and existing_status.get("status") in ["kept", "deleted", "failed"]:
+            status_type = existing_status.get("status")
+            reason_key = "delete_reason" if status_type == "deleted" else "reason"
+            reason = existing_status.get(reason_key, "unknown")
+            logger.info("跳过已处理（%s）的仓库 %s: %s", status_type, repo_full, reason, indent=2)
+            continue
+        pending_records.append(record)
+    if not pending_records:
+        return
+
+    # 使用本批次预克隆的结果
+    clone_info = clone_infos.get(repo_full) or {"cloned": False, "reason": "未预克隆"}
+    if not clone_info["cloned"]:
+        delete_reason = "克隆失败: " + clone_info.get("reason", "unknown")
+        logger.info("跳过仓库 %s: %s", repo_full, delete_reason, indent=3)
+        return
+    if not os.path.isdir(clone_dir):
+        # 其它组因仓库过大已删除该克隆；不写入状态，下次运行重新判断
+        logger.info("跳过仓库 %s: 共享克隆已被删除", repo_full, indent=3)
+        return
+
+    # 同一提交的仓库元信息（pom.xml 位置、仓库大小）跨 CVE、跨运行复用
+    commit = clone_info.get("commit")
+    repo_meta = cache.get_repo_meta(repo_url, commit)
+    pom_paths = repo_meta.get("pom_paths")
+    if pom_paths is None:
+        pom_paths = collect_pom_paths(clone_dir)
+        cache.set_repo_meta(repo_url, commit, pom_paths=pom_paths)
+
+    # 解析依赖版本：(groupId, artifactId) 在组内相同，每个仓库只解析一次
+    pom_found, dep_info = resolve_dependency_version(
+        clone_dir, group_id, artifact_id, cache=cache, maven_repo=args.maven_repo, pom_paths=pom_paths
+    )
+    if not pom_found:
+        for record in pending_records:
+            reject_repo(cache, record.get("CVE_Number", "UNKNOWN"), repo_full, args, "未找到 pom.xml 文件")
+        return
+
+    resolved_version = dep_info.get("resolved_version")
+    dependency_source = dep_info.get("source", "unknown")
+
+    # 逐个 CVE 执行低成本的版本检查
+    version_passed = []
+    for record in pending_records:
+        cve_number = record.get("CVE_Number", "UNKNOWN")
+        cve_version = record.get("CVE_Library_version", "")
+
+        version_match = False
+        reason = "未解析到版本"
+        if resolved_version:
+            version_spec = parse_version_spec(cve_version)
+            version_match = version_satisfies(resolved_version, version_spec)
+            reason = dep_info.get("reason")
+
+        if not version_match:
+            reject_repo(cache, cve_number, repo_full, args, f"版本不匹配: {reason}")
+            continue
+        version_passed.append((record, version_match, reason))
+
+    # 检测源码使用：版本匹配后才检出 Java 源码，所有 CVE 共用一次仓库遍历
+    targets = [(record.get("CVE_Class", ""), record.get("CVE_Method", "")) for record, _, _ in version_passed]
+    if targets and not sparse_checkout(clone_dir, SOURCE_SPARSE_PATTERNS, timeout=args.timeout):
+        # 工作区中只有 pom.xml，扫描必然找不到调用；不写入状态，下次运行重新检出
+        logger.info("跳过仓库 %s: 检出 Java 源码失败", repo_full, indent=3)
+        return
+    usage_infos = detect_usage_batch(clone_dir, targets, cache=cache) if targets else []
+    candidates = []
+    for (record, version_match, reason), usage_info in zip(version_passed, usage_infos):
+        if not usage_info["uses_target_class"] or not usage_info["uses_target_method"]:
+            reject_repo(cache, record.get("CVE_Number", "UNKNOWN"), repo_full, args, "未找到目标类或方法调用")
+            continue
+        candidates.append((record, version_match, reason, usage_info))
+
+    if not candidates:
+        return
+
+    # 构建需要完整工作区
+    checkout_info = full_checkout(clone_dir, timeout=args.timeout, size_mb=repo_meta.get("size_mb"))
+    if "size_mb" in checkout_info and "size_mb" not in repo_meta:
+        cache.set_repo_meta(repo_url, commit, size_mb=checkout_info["size_mb"])
+    if not checkout_info["ok"]:
+        for record, _, _, _ in candidates:
+            reject_repo(cache, record.get("CVE_Number", "UNKNOWN"), repo_full, args, checkout_info["reason"])
+        return
+
+    # 执行构建验证：每个仓库只构建一次，结果由所有候选 CVE 共享
+    build_info = build_repo_only(clone_dir, timeout=args.timeout, maven_repo=args.maven_repo)
+    if not build_info["build_success"]:
+        delete_reason = f"构建失败: {build_info.get('reason', 'unknown')}"
+        for record, _, _, _ in candidates:
+            reject_repo(cache, record.get("CVE_Number", "UNKNOWN"), repo_full, args, delete_reason)
+        return
+
+    # 将共享仓库复制到保留它的 CVE 目录中
+    copy_repository_to_cve_dirs(
+        repo_full, clone_dir, [record.get("CVE_Number", "UNKNOWN") for record, _, _, _ in candidates], args
+    )
+
+    for record, version_match, reason, usage_info in candidates:
+        cve_number = record.get("CVE_Number", "UNKNOWN")
+        cve_version = record.get("CVE_Library_version", "")
+
+        # 仓库满足所有条件，保留并记录
+        match = {
+            "repo": repo_full,
+            "repo_url": repo_url,
+            "commit": clone_info.get("commit"),
+            "pom_found": pom_found,
+            "dependency_version_resolved": resolved_version,
+            "dependency_version_source": dependency_source,
+            "version_match": version_match,
+            "version_match_reason": reason,
+            "uses_target_class": usage_info["uses_target_class"],
+            "uses_target_method": usage_info["uses_target_method"],
+            "build_success": build_info["build_success"],
+            "build_cmd": build_info.get("build_cmd"),
+            "evidence": {
+                "class_hit_files": usage_info.get("class_hit_files", []),
+                "method_call_snippets": usage_info.get("method_call_snippets", []),
+            },
+        }
+
+        # 保存保留状态
+        cache.mark_repo_kept(cve_number, repo_full, build_info, version_match, usage_info)
+
+        logger.info("保留仓库 %s 用于 CVE %s", repo_full, cve_number, indent=3)
+
+        # 交给共享的 JsonlWriter 缓冲写入：攒满 flush_every 条（或 flush_bytes 字节）或关闭时才落盘，
+        # 何时 fsync 由 durability 策略决定
+        temp_result = {
+            "CVE_Number": cve_number,
+            "CVE_Library": library_name,
+            "Target_Maven": {"groupId": group_id, "artifactId": artifact_id, "version": cve_version},
+            "Matches": [match],
+            "best_match": repo_full
+        }
+        writer.write(temp_result)
+
+
+def process_library_group(library_name, cve_records, searcher, store, args, cache, writer):
     """处理一个 Library 组的所有 CVE 记录，共享仓库克隆。"""
-    logger.info(f"开始处理 Library 组: {library_name} ({len(cve_records)} 个 CVE)", indent=0)
+    logger.info("开始处理 Library 组: %s (%s 个 CVE)", library_name, len(cve_records), indent=0)
     
     # 解析 Library 坐标
     coords = parse_library_coords(library_name)
     if not coords:
-        logger.warning(f"无法解析 Library 坐标: {library_name}", indent=1)
+        logger.warning("无法解析 Library 坐标: %s", library_name, indent=1)
         # 为每个 CVE 生成错误结果
         for record in cve_records:
             cve_number = record.get("CVE_Number", "UNKNOWN")
@@ -71,7 +345,7 @@ def process_library_group(library_name, cve_records, searcher, args, cache, outp
                 "Matches": [],
                 "reason": "无法解析 CVE_Library 格式"
             }
-            append_jsonl(output_path, error_result)
+            writer.write(error_result)
         return
     
     group_id = coords["groupId"]
@@ -81,24 +355,20 @@ def process_library_group(library_name, cve_records, searcher, args, cache, outp
     cve_numbers = [record.get("CVE_Number", "UNKNOWN") for record in cve_records]
     
     # 检查是否已有搜索结果缓存（按 Library 名称）
-    library_cache_key = f"LIBRARY_{library_name.replace('/', '__')}"
-    if cache.has_search_results(library_cache_key):
-        repos = cache.load_search_results(library_cache_key)
-        logger.info(f"已从缓存加载搜索结果，Library: {library_name}", indent=1)
+    cache_key = library_cache_key(library_name)
+    if cache.has_search_results(cache_key):
+        repos = cache.load_search_results(cache_key)
+        logger.info("已从缓存加载搜索结果，Library: %s", library_name, indent=1)
     else:
         # 执行 GitHub 搜索
-        query_terms = [
-            f'{group_id}',
-            "filename:pom.xml",
-        ]
-        query = "+".join(query_terms)
-        logger.info(f"GitHub 搜索查询: {query}", indent=1)
+        query = build_library_query(group_id)
+        logger.info("GitHub 搜索查询: %s", query, indent=1)
         repos = searcher.search_repositories(query, max_repos=args.topk)
-        cache.save_search_results(library_cache_key, repos)
-        logger.info(f"已保存搜索结果到缓存，Library: {library_name}", indent=1)
+        cache.save_search_results(cache_key, repos)
+        logger.info("已保存搜索结果到缓存，Library: %s", library_name, indent=1)
     
     if not repos:
-        logger.warning(f"未找到候选仓库，Library: {library_name}", indent=1)
+        logger.warning("未找到候选仓库，Library: %s", library_name, indent=1)
         # 为每个 CVE 生成无结果
         for record in cve_records:
             cve_number = record.get("CVE_Number", "UNKNOWN")
@@ -109,138 +379,36 @@ def process_library_group(library_name, cve_records, searcher, args, cache, outp
                 "Matches": [],
                 "reason": "未找到候选仓库"
             }
-            append_jsonl(output_path, no_result)
+            writer.write(no_result)
         return
     
-    logger.info(f"预处理 {len(repos)} 个仓库用于 Library: {library_name}", indent=1)
-    
-    # 创建临时工作目录
-    temp_workdir = os.path.join(args.workdir, "_temp_library_processing")
-    os.makedirs(temp_workdir, exist_ok=True)
-    
-    # 处理每个候选仓库
-    for repo in repos:
-        repo_full = repo["full_name"]
-        repo_url = repo["html_url"]
-        
-        logger.info(f"预处理仓库: {repo_full}", indent=2)
-        # 克隆到临时目录
-        temp_clone_dir = os.path.join(temp_workdir, repo_full.replace("/", "__"))
-
-        # 为每个 CVE 进行独立的验证
-        for record in cve_records:
-            cve_number = record.get("CVE_Number", "UNKNOWN")
-            cve_version = record.get("CVE_Library_version", "")
-            cve_class = record.get("CVE_Class", "")
-            cve_method = record.get("CVE_Method", "")
-            
-            # 检查是否已经处理过这个仓库（针对这个 CVE）
-            existing_status = cache.load_clone_status(cve_number, repo_full)
-            if existing_status and existing_status.get("status") in ["kept", "deleted", "failed"]:
-                status_type = existing_status.get("status")
-                reason_key = "delete_reason" if status_type == "deleted" else "reason"
-                reason = existing_status.get(reason_key, "unknown")
-                logger.info(f"跳过已处理（{status_type}）的仓库 {repo_full}: {reason}", indent=2)
-                continue
-            else:
-
-                if os.path.exists(temp_clone_dir):
-                    logger.info(f"仓库已存在于临时目录: {temp_clone_dir}", indent=3)
-                else:
-                    # 克隆仓库到临时目录
-                    clone_info = clone_repo(repo_url, temp_clone_dir, timeout=args.timeout)
-                    if not clone_info["cloned"]:
-                        delete_reason = "克隆失败: " + clone_info.get("reason", "unknown")
-                        logger.info(f"跳过仓库 {repo_full}: {delete_reason}", indent=3)
-                        continue
-
-                # 将临时克隆的仓库复制到所有相关 CVE 的目录中
-                copied_dirs = copy_repository_to_cve_dirs(repo_full, temp_clone_dir, cve_numbers, args)
-            
-            # 获取该 CVE 对应的克隆目录
-            cve_clone_dir = copied_dirs[cve_number]
-            
-            # 解析依赖版本
-            pom_found, dep_info = resolve_dependency_version(cve_clone_dir, group_id, artifact_id)
-            if not pom_found:
-                delete_reason = "未找到 pom.xml 文件"
-                cache.mark_repo_deleted(cve_number, repo_full, args.workdir, delete_reason)
-                logger.info(f"跳过仓库 {repo_full}: {delete_reason}", indent=3)
-                continue
-
-            resolved_version = dep_info.get("resolved_version")
-            dependency_source = dep_info.get("source", "unknown")
-            version_match = False
-            reason = "未解析到版本"
-            if resolved_version:
-                version_spec = parse_version_spec(cve_version)
-                version_match = version_satisfies(resolved_version, version_spec)
-                reason = dep_info.get("reason")
-
-            if not version_match:
-                delete_reason = f"版本不匹配: {reason}"
-                cache.mark_repo_deleted(cve_number, repo_full, args.workdir, delete_reason)
-                logger.info(f"跳过仓库 {repo_full}: {delete_reason}", indent=3)
-                continue
-
-            # 检测源码使用
-            usage_info = detect_usage(cve_clone_dir, cve_class, cve_method)
-            if not usage_info["uses_target_class"] or not usage_info["uses_target_method"]:
-                delete_reason = "未找到目标类或方法调用"
-                cache.mark_repo_deleted(cve_number, repo_full, args.workdir, delete_reason)
-                logger.info(f"跳过仓库 {repo_full}: {delete_reason}", indent=3)
-                continue
-
-            # 执行构建验证
-            build_info = build_repo_only(cve_clone_dir, timeout=args.timeout)
-            if not build_info["build_success"]:
-                delete_reason = f"构建失败: {build_info.get('reason', 'unknown')}"
-                cache.mark_repo_deleted(cve_number, repo_full, args.workdir, delete_reason)
-                logger.info(f"跳过仓库 {repo_full}: {delete_reason}", indent=3)
-                continue
-
-            # 仓库满足所有条件，保留并记录
-            match = {
-                "repo": repo_full,
-                "repo_url": repo_url,
-                "commit": clone_info.get("commit"),
-                "pom_found": pom_found,
-                "dependency_version_resolved": resolved_version,
-                "dependency_version_source": dependency_source,
-                "version_match": version_match,
-                "version_match_reason": reason,
-                "uses_target_class": usage_info["uses_target_class"],
-                "uses_target_method": usage_info["uses_target_method"],
-                "build_success": build_info["build_success"],
-                "build_cmd": build_info.get("build_cmd"),
-                "evidence": {
-                    "class_hit_files": usage_info.get("class_hit_files", []),
-                    "method_call_snippets": usage_info.get("method_call_snippets", []),
-                },
-            }
-
-            # 保存保留状态
-            cache.mark_repo_kept(cve_number, repo_full, build_info, version_match, usage_info)
-
-            logger.info(f"保留仓库 {repo_full} 用于 CVE {cve_number}", indent=3)
-            
-            # 实时追加保存这个匹配结果
-            temp_result = {
-                "CVE_Number": cve_number,
-                "CVE_Library": library_name,
-                "Target_Maven": {"groupId": group_id, "artifactId": artifact_id, "version": cve_version},
-                "Matches": [match],
-                "best_match": repo_full
-            }
-            append_jsonl(output_path, temp_result)
-        
-        # 清理临时克隆目录（可选，为了节省空间）
-        shutil.rmtree(temp_clone_dir, ignore_errors=True)
+    logger.info("预处理 %s 个仓库用于 Library: %s", len(repos), library_name, indent=1)
     
-    # 清理临时工作目录（可选）
-    shutil.rmtree(temp_workdir, ignore_errors=True)
+    # 处理每个候选仓库：每批仓库先并行克隆到共享存储，再逐个验证；
+    # 本组验证完一个仓库即释放登记，没有其它组使用时删除其克隆
+    batch_size = max(1, args.clone_concurrency)
+    clone_infos = {}
+    store.acquire([repo["full_name"] for repo in repos])
+    released = 0
+    try:
+        for index, repo in enumerate(repos):
+            if index % batch_size == 0:
+                batch = repos[index:index + batch_size]
+                reject_oversized_repos(batch, cve_records, store, args, cache)
+                prefilter_by_remote_pom(batch, cve_records, group_id, artifact_id, store, args, cache)
+                clone_infos = preclone_repos(batch, cve_numbers, store, args, cache)
+            try:
+                # 工作区可能被其他 Library 组同时使用，验证期间独占锁定
+                with store.lock(repo["full_name"]):
+                    process_repo(repo, clone_infos, cve_records, library_name, group_id, artifact_id, store, args, cache, writer)
+            finally:
+                released += 1
+                store.release(repo["full_name"])
+    finally:
+        for repo in repos[released:]:
+            store.release(repo["full_name"])
     
-    logger.info(f"Library 组 {library_name} 处理完成", indent=0)
+    logger.info("Library 组 %s 处理完成", library_name, indent=0)
 
 
 def main():
@@ -250,33 +418,61 @@ def main():
     parser.add_argument("--topk", type=int, default=1000, help="每个 CVE 最多处理的仓库数量（GitHub API 限制: 1000）")
     parser.add_argument("--workdir", default=".workdir", help="克隆仓库的工作目录")
     parser.add_argument("--timeout", type=int, default=300, help="克隆和构建超时时间（秒，默认300秒）")
+    parser.add_argument("--github-tokens", default="", help="逗号分隔的 GitHub token 列表，轮询使用以提升搜索限额（默认读取 GITHUB_TOKEN）")
+    parser.add_argument("--clone-concurrency", type=int, default=8, help="每个 Library 组内并行克隆的仓库数量（默认8）")
+    parser.add_argument("--jobs", type=int, default=4, help="并发处理的 Library 组数量（默认4）")
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count() or 1, help="Java 方法调用扫描进程数（默认 CPU 核数，<=1 时在主进程内串行解析）")
+    parser.add_argument("--maven-repo", default="", help="所有构建共用的 Maven 本地仓库目录（默认使用 Maven 自身的 ~/.m2/repository）")
     args = parser.parse_args()
 
     setup_logger()
     ensure_dir(args.workdir)
+    if args.maven_repo:
+        # 构建在各仓库目录下执行，需转换为绝对路径才能共用同一个本地仓库
+        args.maven_repo = os.path.abspath(args.maven_repo)
+        ensure_dir(args.maven_repo)
     output_path = Path(args.output)
     ensure_dir(str(output_path.parent))
 
     # 清空输出文件（新运行）
     if os.path.exists(args.output):
-        logger.info(f"发现现有输出文件，将覆盖内容", indent=0)
-    open(args.output, 'w').close()
-    logger.info(f"创建新的输出文件: {args.output}", indent=0)
+        logger.info("发现现有输出文件，将覆盖内容", indent=0)
+    writer = JsonlWriter(args.output, mode="w")
+    logger.info("创建新的输出文件: %s", args.output, indent=0)
 
-    records = load_vuln_records(args.input)
-    
-    # 按 Library 分组
-    library_groups = group_records_by_library(records)
-    logger.info(f"共 {len(records)} 个 CVE，分组为 {len(library_groups)} 个 Library", indent=0)
+    # 流式读取输入并按 Library 分组
+    library_groups, total_records, (max_library, max_count) = group_records_by_library(iter_vuln_records(args.input))
+    logger.info("共 %s 个 CVE，分组为 %s 个 Library", total_records, len(library_groups), indent=0)
+    if max_library:
+        logger.info("CVE 最多的 Library: %s（%s 个）", max_library, max_count, indent=1)
     
-    searcher = GitHubSearcher(token="")
+    tokens = [token.strip() for token in args.github_tokens.split(",") if token.strip()]
+    if not tokens and os.environ.get("GITHUB_TOKEN"):
+        tokens = [os.environ["GITHUB_TOKEN"]]
+    searcher = GitHubSearcher(token=tokens[0] if tokens else "")
     cache = IntermediateCache(base_dir="intermediate")
+    store = RepoStore(os.path.join(args.workdir, "_shared_repos"))
+
+    # 预先批量搜索所有 Library，后续处理直接命中缓存
+    presearch_libraries(library_groups, tokens, args, cache)
+
+    set_parse_workers(args.parse_workers)
 
-    # 处理每个 Library 组
-    for library_name, cve_records in library_groups.items():
-        process_library_group(library_name, cve_records, searcher, args, cache, str(output_path))
+    # 并发处理每个 Library 组：耗时集中在网络与 git/mvn 子进程上，线程即可并行
+    with writer, ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        futures = {
+            executor.submit(process_library_group, library_name, cve_records, searcher, store, args, cache, writer): library_name
+            for library_name, cve_records in library_groups.items()
+        }
+        for future in as_completed(futures):
+            library_name = futures[future]
+            try:
+                future.result()
+            except Exception as exc:
+                logger.error("Library 组 %s 处理异常: %s", library_name, exc, indent=0)
+    shutdown_parse_pool()
 
-    logger.info(f"所有 Library 组处理完成，结果已保存到 {args.output}", indent=0)
+    logger.info("所有 Library 组处理完成，结果已保存到 %s", args.output, indent=0)
 
 
 if __name__ == "__main__":
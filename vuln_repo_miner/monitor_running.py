@@ -7,9 +7,24 @@
 import os
 import json
 import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 
+
+def count_entries(path, predicate):
+    """用 os.scandir 统计目录中满足条件的条目数（DirEntry 自带类型缓存，无需逐个 stat）"""
+    try:
+        with os.scandir(path) as entries:
+            return sum(1 for entry in entries if predicate(entry))
+    except FileNotFoundError:
+        return 0
+
+
+def is_real_dir(entry):
+    return entry.is_dir(follow_symlinks=False)
+
+
 def monitor_cve_mining():
     """监控 CVE 挖掘工具的运行状态"""
     
@@ -25,23 +40,22 @@ def monitor_cve_mining():
     
     # 1. 检查输出文件
     if output_file.exists():
-        with open(output_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        total_cves = len(lines)
+        total_cves = 0
         matched_cves = 0
         total_matches = 0
         
-        for line in lines:
-            if line.strip():
-                try:
-                    result = json.loads(line)
-                    matches = result.get('Matches', [])
-                    if matches:
-                        matched_cves += 1
-                        total_matches += len(matches)
-                except json.JSONDecodeError:
-                    continue
+        with open(output_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                total_cves += 1
+                if line.strip():
+                    try:
+                        result = json.loads(line)
+                        matches = result.get('Matches', [])
+                        if matches:
+                            matched_cves += 1
+                            total_matches += len(matches)
+                    except json.JSONDecodeError:
+                        continue
         
         print(f"📊 输出文件状态:")
         print(f"   - 总 CVE 数量: {total_cves}")
@@ -54,12 +68,14 @@ def monitor_cve_mining():
     
     # 2. 检查工作目录
     if workdir.exists():
-        cve_dirs = [d for d in workdir.iterdir() if d.is_dir()]
+        # _shared_repos 等以下划线开头的目录是共享克隆缓存，不属于 CVE 目录
+        with os.scandir(workdir) as entries:
+            cve_dirs = [e for e in entries if is_real_dir(e) and not e.name.startswith("_")]
         print(f"📁 工作目录状态:")
         print(f"   - 正在处理的 CVE 目录数: {len(cve_dirs)}")
         if len(cve_dirs) <= 5:
             for cve_dir in cve_dirs:
-                repo_count = len([r for r in cve_dir.iterdir() if r.is_dir()])
+                repo_count = count_entries(cve_dir.path, is_real_dir)
                 print(f"     - {cve_dir.name}: {repo_count} 个仓库")
         print()
     
@@ -68,8 +84,8 @@ def monitor_cve_mining():
         search_dir = intermediate_dir / "search_results"
         clone_dir = intermediate_dir / "clone_status"
         
-        search_count = len(list(search_dir.glob("*.json"))) if search_dir.exists() else 0
-        clone_count = len(list(clone_dir.glob("*"))) if clone_dir.exists() else 0
+        search_count = count_entries(search_dir, lambda e: e.name.endswith(".json"))
+        clone_count = count_entries(clone_dir, lambda e: not e.name.startswith("."))
         
         print(f"💾 中间结果缓存:")
         print(f"   - 搜索结果缓存: {search_count} 个 CVE")
@@ -84,10 +100,10 @@ def monitor_cve_mining():
         # 读取最后几行
         try:
             with open(latest_log, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+                lines = deque(f, maxlen=3)
                 if lines:
                     print("   最后几行日志:")
-                    for line in lines[-3:]:
+                    for line in lines:
                         print(f"     {line.strip()}")
         except Exception as e:
             print(f"   读取日志失败: {e}")
@@ -1,26 +1,170 @@
 """构建模块：clone 仓库并执行 Maven 构建。"""
 
+import asyncio
+import contextlib
+import fcntl
 import logging
 import os
+import shutil
 import subprocess
+import sys
+import threading
 import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from src.utils import ensure_dir, kill_process_group, run_command
 
 
 MAX_REPO_SIZE_MB = 512
 
+# 部分克隆后按阶段逐步检出的文件：先只要 pom.xml，依赖版本匹配后再补充 Java 源码
+POM_SPARSE_PATTERNS = ["**/pom.xml"]
+SOURCE_SPARSE_PATTERNS = ["**/pom.xml", "**/*.java"]
+
+# 构建时的默认 JVM 参数，用户已设置 MAVEN_OPTS 时不覆盖
+DEFAULT_MAVEN_OPTS = "-Xmx2g -XX:+UseParallelGC"
+
+
+def _run(cmd, cwd=None, timeout=300, env=None):
+    """执行命令并返回结果，超时会结束整个进程组。"""
+    return run_command(cmd, cwd=cwd, timeout=timeout, env=env)
+
+
+def maven_env() -> Dict[str, str]:
+    """执行 mvn 时使用的环境变量（补充默认 MAVEN_OPTS）。"""
+    env = os.environ.copy()
+    env.setdefault("MAVEN_OPTS", DEFAULT_MAVEN_OPTS)
+    return env
+
+
+def _repo_size_mb(path: str, cap_bytes: int = MAX_REPO_SIZE_MB * 1024 * 1024) -> int:
+    """获取仓库大小（MB），超过 cap_bytes 后提前返回，不再继续遍历。"""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    total += entry.stat(follow_symlinks=False).st_size
+                    if total > cap_bytes:
+                        return total // (1024 * 1024)
+        except OSError:
+            continue
+    return total // (1024 * 1024)
 
-def _run(cmd, cwd=None, timeout=300):
-    """执行命令并返回结果。"""
-    return subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=timeout)
+
+def _describe_clone_error(stderr: str) -> str:
+    """根据 git clone 的错误输出生成失败原因。"""
+    # 提取具体的错误信息
+    error_output = stderr.strip() if stderr else "未知错误"
+    if len(error_output) > 200:
+        error_output = error_output[-200:] + "..."
+
+    # 判断常见错误类型
+    if "Connection timed out" in error_output or "Could not read from remote repository" in error_output:
+        return f"网络连接问题: {error_output}"
+    if "Repository not found" in error_output:
+        return f"仓库不存在: {error_output}"
+    return f"克隆失败: {error_output}"
+
+
+def _clone_cmd(repo_url: str, clone_dir: str) -> List[str]:
+    """生成部分克隆命令：不下载文件内容、不检出工作区，由稀疏检出按需拉取。"""
+    return ["git", "clone", "--filter=blob:none", "--depth", "1", "--no-checkout", repo_url, clone_dir]
+
+
+def sparse_checkout(clone_dir: str, patterns: List[str], timeout: int = 300) -> bool:
+    """将工作区稀疏检出限定为指定模式的文件，缺失的文件内容按需拉取。"""
+    try:
+        result = _run(["git", "sparse-checkout", "set", "--no-cone", *patterns], cwd=clone_dir, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        logging.warning("稀疏检出超时: %s", clone_dir)
+        return False
+    if result.returncode != 0:
+        logging.warning("稀疏检出失败: %s", result.stderr.strip()[-200:])
+        return False
+    return True
 
 
-def _repo_size_mb(path: str) -> int:
-    """获取仓库大小（MB）。"""
-    result = _run(["du", "-sm", path])
+def full_checkout(clone_dir: str, timeout: int = 300, size_mb: Optional[int] = None) -> Dict[str, object]:
+    """构建前检出完整工作区，并检查仓库大小限制；传入已缓存的 size_mb 时不再遍历目录。"""
+    try:
+        result = _run(["git", "sparse-checkout", "disable"], cwd=clone_dir, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"ok": False, "reason": f"完整检出超时（{timeout}秒）"}
     if result.returncode != 0:
-        return 0
-    size_str = result.stdout.split()[0]
-    return int(size_str)
+        return {"ok": False, "reason": f"完整检出失败: {result.stderr.strip()[-200:]}"}
+
+    # 检查仓库大小
+    if size_mb is None:
+        size_mb = _repo_size_mb(clone_dir)
+    if size_mb > MAX_REPO_SIZE_MB:
+        logging.warning("仓库过大 (%s MB)，跳过并删除克隆", size_mb)
+        shutil.rmtree(clone_dir, ignore_errors=True)
+        return {"ok": False, "reason": f"仓库过大 ({size_mb} MB)", "size_mb": size_mb}
+    return {"ok": True, "size_mb": size_mb}
+
+
+def _finalize_clone(repo_url: str, clone_dir: str) -> Dict[str, object]:
+    """克隆完成后的处理：只检出 pom.xml 并获取提交哈希。"""
+    # 初始只检出 pom.xml，稀疏检出不可用时退回完整检出
+    try:
+        if not sparse_checkout(clone_dir, POM_SPARSE_PATTERNS):
+            _run(["git", "sparse-checkout", "disable"], cwd=clone_dir)
+        checkout_result = _run(["git", "checkout"], cwd=clone_dir)
+    except subprocess.TimeoutExpired as e:
+        shutil.rmtree(clone_dir, ignore_errors=True)
+        return {"cloned": False, "reason": f"检出超时（{e.timeout}秒）"}
+    if checkout_result.returncode != 0:
+        shutil.rmtree(clone_dir, ignore_errors=True)
+        return {"cloned": False, "reason": f"检出失败: {checkout_result.stderr.strip()[-200:]}"}
+
+    logging.info("仓库克隆成功: %s", repo_url)
+    return {"cloned": True, "commit": head_commit(clone_dir), "reason": "success"}
+
+
+def _read_head_commit(git_dir: str) -> Optional[str]:
+    """直接读取 .git/HEAD 及对应引用文件（含 packed-refs）解析提交哈希。"""
+    with open(os.path.join(git_dir, "HEAD"), "r", encoding="utf-8") as handle:
+        head = handle.read().strip()
+    if not head.startswith("ref: "):
+        return head or None
+    ref = head[len("ref: "):]
+    ref_path = os.path.join(git_dir, *ref.split("/"))
+    if os.path.isfile(ref_path):
+        with open(ref_path, "r", encoding="utf-8") as handle:
+            return handle.read().strip() or None
+    packed_refs = os.path.join(git_dir, "packed-refs")
+    if os.path.isfile(packed_refs):
+        with open(packed_refs, "r", encoding="utf-8") as handle:
+            for line in handle:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    return None
+
+
+def head_commit(clone_dir: str) -> Optional[str]:
+    """获取仓库当前 HEAD 的提交哈希，优先读文件，失败时回退到 git rev-parse。"""
+    git_dir = os.path.join(clone_dir, ".git")
+    if os.path.isdir(git_dir):
+        try:
+            commit = _read_head_commit(git_dir)
+            if commit:
+                return commit
+        except OSError:
+            pass
+    try:
+        commit_result = _run(["git", "rev-parse", "HEAD"], cwd=clone_dir)
+        if commit_result.returncode == 0:
+            return commit_result.stdout.strip()
+    except Exception as e:
+        logging.warning("获取提交哈希失败: %s", e)
+    return None
 
 
 def clone_repo_with_retry(repo_url: str, clone_dir: str, timeout: int = 300, max_retries: int = 3):
@@ -29,7 +173,7 @@ def clone_repo_with_retry(repo_url: str, clone_dir: str, timeout: int = 300, max
         logging.info("仓库已克隆: %s", clone_dir)
         return {"cloned": True, "reason": "already_exists", "commit": None}
     
-    os.makedirs(os.path.dirname(clone_dir), exist_ok=True)
+    ensure_dir(os.path.dirname(clone_dir))
     
     for attempt in range(max_retries):
         if attempt > 0:
@@ -39,7 +183,7 @@ def clone_repo_with_retry(repo_url: str, clone_dir: str, timeout: int = 300, max
         
         logging.info("正在克隆 %s (尝试 %d/%d)", repo_url, attempt + 1, max_retries)
         try:
-            result = _run(["git", "clone", "--depth", "1", repo_url, clone_dir], timeout=timeout)
+            result = _run(_clone_cmd(repo_url, clone_dir), timeout=timeout)
         except subprocess.TimeoutExpired:
             error_msg = f"克隆超时（{timeout}秒）"
             logging.error("克隆失败: %s", error_msg)
@@ -48,64 +192,195 @@ def clone_repo_with_retry(repo_url: str, clone_dir: str, timeout: int = 300, max
             continue
         
         if result.returncode != 0:
-            # 提取具体的错误信息
-            error_output = result.stderr.strip() if result.stderr else "未知错误"
-            if len(error_output) > 200:
-                error_output = error_output[-200:] + "..."
-            
-            # 判断常见错误类型
-            if "Connection timed out" in error_output or "Could not read from remote repository" in error_output:
-                error_msg = f"网络连接问题: {error_output}"
-            elif "Repository not found" in error_output:
-                error_msg = f"仓库不存在: {error_output}"
-            else:
-                error_msg = f"克隆失败: {error_output}"
-            
+            error_msg = _describe_clone_error(result.stderr)
             logging.error("克隆失败: %s", error_msg)
             if attempt == max_retries - 1:
                 return {"cloned": False, "reason": error_msg}
             continue
-        
-        # 克隆成功，检查仓库大小
-        size_mb = _repo_size_mb(clone_dir)
-        if size_mb > MAX_REPO_SIZE_MB:
-            logging.warning("仓库过大 (%s MB)，跳过", size_mb)
-            # 清理已克隆的目录
-            try:
-                import shutil
-                shutil.rmtree(clone_dir)
-            except Exception as e:
-                logging.warning("清理过大仓库失败: %s", e)
-            return {"cloned": False, "reason": f"仓库过大 ({size_mb} MB)"}
-        
-        # 获取提交哈希
-        commit = None
-        try:
-            commit_result = _run(["git", "rev-parse", "HEAD"], cwd=clone_dir)
-            if commit_result.returncode == 0:
-                commit = commit_result.stdout.strip()
-        except Exception as e:
-            logging.warning("获取提交哈希失败: %s", e)
-        
-        logging.info("仓库克隆成功: %s", repo_url)
-        return {"cloned": True, "commit": commit, "reason": "success"}
+
+        return _finalize_clone(repo_url, clone_dir)
     
     # 理论上不会到达这里，但为了安全起见
     return {"cloned": False, "reason": "未知错误"}
 
 
-def build_repo_only(clone_dir: str, timeout: int = 300):
-    """只执行构建，假设仓库已经克隆。"""
-    mvnw_path = os.path.join(clone_dir, "mvnw")
-    if os.path.exists(mvnw_path):
-        cmd = ["./mvnw", "-q", "-DskipTests", "package"]
+async def _clone_one(repo_url: str, clone_dir: str, timeout: int, semaphore: asyncio.Semaphore) -> Dict[str, object]:
+    """在信号量限制下异步克隆单个仓库。"""
+    async with semaphore:
+        if os.path.exists(clone_dir):
+            logging.info("仓库已克隆: %s", clone_dir)
+            return {"cloned": True, "reason": "already_exists", "commit": None}
+        ensure_dir(os.path.dirname(clone_dir))
+
+        logging.info("正在并行克隆 %s", repo_url)
+        proc = await asyncio.create_subprocess_exec(
+            *_clone_cmd(repo_url, clone_dir),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+        try:
+            _, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            kill_process_group(proc.pid)
+            await proc.wait()
+            shutil.rmtree(clone_dir, ignore_errors=True)
+            error_msg = f"克隆超时（{timeout}秒）"
+            logging.error("克隆失败: %s", error_msg)
+            return {"cloned": False, "reason": error_msg}
+
+        if proc.returncode != 0:
+            shutil.rmtree(clone_dir, ignore_errors=True)
+            error_msg = _describe_clone_error(stderr.decode("utf-8", errors="ignore"))
+            logging.error("克隆失败: %s", error_msg)
+            return {"cloned": False, "reason": error_msg}
+
+    return await asyncio.to_thread(_finalize_clone, repo_url, clone_dir)
+
+
+async def clone_many(repo_urls: List[str], dirs: List[str], timeout: int = 300, concurrency: int = 8) -> List[Dict[str, object]]:
+    """并行克隆多个仓库，返回与输入顺序一致的克隆结果列表。"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    return await asyncio.gather(*(
+        _clone_one(repo_url, clone_dir, timeout, semaphore)
+        for repo_url, clone_dir in zip(repo_urls, dirs)
+    ))
+
+
+class RepoStore:
+    """跨 Library 组共享的仓库克隆存储：同一仓库在使用期间只克隆一次，各组复用同一份工作区。
+
+    每个仓库对应一个 flock 文件锁，克隆与后续检出/构建都需在锁内进行，
+    以免并发的 Library 组同时修改同一工作区。各组通过 acquire/release 登记使用中的仓库，
+    最后一个使用者释放后删除克隆，避免长时间运行时磁盘被占满。
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+        self._users: Counter = Counter()
+        self._users_lock = threading.Lock()
+
+    def acquire(self, repo_fulls: List[str]) -> None:
+        """登记一批即将使用的仓库，登记期间不会被其它组删除。"""
+        with self._users_lock:
+            self._users.update(repo_fulls)
+
+    def release(self, repo_full: str) -> None:
+        """释放一次仓库使用登记，没有其它使用者时删除其克隆（含构建输出）。"""
+        with self._users_lock:
+            self._users[repo_full] -= 1
+            if self._users[repo_full] > 0:
+                return
+            del self._users[repo_full]
+        with self.lock(repo_full), self._users_lock:
+            # 等锁期间可能又有组登记了该仓库
+            if repo_full not in self._users:
+                shutil.rmtree(self.path(repo_full), ignore_errors=True)
+
+    def path(self, repo_full: str) -> str:
+        """获取仓库在共享存储中的目录。"""
+        return os.path.join(self.root_dir, repo_full.replace("/", "__"))
+
+    @contextlib.contextmanager
+    def lock(self, repo_full: str):
+        """独占锁定指定仓库。"""
+        with open(self.path(repo_full) + ".lock", "w") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def get_or_clone(self, repo_full: str, repo_url: str, timeout: int = 300) -> Dict[str, object]:
+        """获取仓库克隆，不存在时克隆到共享存储。"""
+        return self.clone_many([(repo_full, repo_url)], timeout=timeout)[repo_full]
+
+    def clone_many(self, repos: List[Tuple[str, str]], timeout: int = 300, concurrency: int = 8) -> Dict[str, Dict[str, object]]:
+        """并行克隆一批 (full_name, url) 仓库，已存在的直接复用，并行克隆失败的回退到带重试的同步克隆。"""
+        clone_infos: Dict[str, Dict[str, object]] = {}
+        with contextlib.ExitStack() as stack:
+            # 按名称顺序加锁，避免并发批次之间死锁
+            for repo_full in sorted({repo_full for repo_full, _ in repos}):
+                stack.enter_context(self.lock(repo_full))
+
+            missing = [(repo_full, repo_url) for repo_full, repo_url in repos if not os.path.exists(self.path(repo_full))]
+            if missing:
+                results = asyncio.run(clone_many(
+                    [repo_url for _, repo_url in missing],
+                    [self.path(repo_full) for repo_full, _ in missing],
+                    timeout=timeout,
+                    concurrency=concurrency,
+                ))
+                for (repo_full, repo_url), clone_info in zip(missing, results):
+                    if not clone_info["cloned"]:
+                        clone_info = clone_repo_with_retry(repo_url, self.path(repo_full), timeout=timeout)
+                    clone_infos[repo_full] = clone_info
+
+            for repo_full, _ in repos:
+                if repo_full not in clone_infos:
+                    logging.info("复用共享仓库: %s", repo_full)
+                    clone_infos[repo_full] = {"cloned": True, "reason": "already_exists", "commit": head_commit(self.path(repo_full))}
+        return clone_infos
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """优先创建硬链接，跨文件系统等情况下回退为普通复制。"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def copy_repo_tree(src_dir: str, dst_dir: str) -> str:
+    """以尽量低的开销复制仓库目录，返回实际使用的复制方式。
+
+    优先使用写时复制（Linux 的 reflink、macOS APFS 的 clonefile），只复制元数据；
+    文件系统不支持时 cp 直接失败，回退到硬链接。硬链接与源文件共享 inode，因此跳过 Maven 会原地写入的 target/ 目录。
+    dst_dir 已存在时先删除，否则 cp 会把仓库复制到其子目录中。
+    """
+    if os.path.lexists(dst_dir):
+        shutil.rmtree(dst_dir)
+    if sys.platform == "darwin":
+        cmd = ["cp", "-a", "-c", src_dir, dst_dir]
     else:
-        cmd = ["mvn", "-q", "-DskipTests", "package"]
+        cmd = ["cp", "-a", "--reflink=always", src_dir, dst_dir]
+    try:
+        result = _run(cmd, timeout=600)
+        if result.returncode == 0:
+            return "cp"
+        # 文件系统不支持写时复制（如 ext4）时属正常情况
+        logging.info("cp 写时复制不可用，回退到硬链接: %s", result.stderr.strip()[-200:])
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logging.warning("cp 复制失败，回退到硬链接: %s", e)
+
+    shutil.rmtree(dst_dir, ignore_errors=True)
+    shutil.copytree(
+        src_dir,
+        dst_dir,
+        symlinks=True,
+        copy_function=_link_or_copy,
+        ignore=shutil.ignore_patterns("target"),
+    )
+    return "hardlink"
+
+
+def build_repo_only(clone_dir: str, timeout: int = 300, maven_repo: Optional[str] = None):
+    """只执行构建，假设仓库已经克隆。
+
+    使用 -T 1C 按 CPU 核数并行构建多模块项目；传入 maven_repo 时所有构建共用该本地仓库。
+    """
+    mvnw_path = os.path.join(clone_dir, "mvnw")
+    mvn = "./mvnw" if os.path.exists(mvnw_path) else "mvn"
+    cmd = [mvn, "-q", "-T", "1C", "-DskipTests"]
+    if maven_repo:
+        cmd.append(f"-Dmaven.repo.local={maven_repo}")
+    cmd.append("package")
 
     logging.info("使用命令构建: %s", " ".join(cmd))
     start = time.time()
     try:
-        result = _run(cmd, cwd=clone_dir, timeout=timeout)
+        result = _run(cmd, cwd=clone_dir, timeout=timeout, env=maven_env())
     except subprocess.TimeoutExpired:
         return {
             "build_success": False,
@@ -131,9 +406,9 @@ def build_repo_only(clone_dir: str, timeout: int = 300):
     }
 
 
-def build_repo_from_dir(clone_dir: str, timeout: int = 300):
+def build_repo_from_dir(clone_dir: str, timeout: int = 300, maven_repo: Optional[str] = None):
     """从已克隆的目录执行构建。"""
-    return build_repo_only(clone_dir, timeout)
+    return build_repo_only(clone_dir, timeout, maven_repo)
 
 
 def clone_and_build_repo(repo_url: str, clone_dir: str, timeout: int = 300, max_retries: int = 3):
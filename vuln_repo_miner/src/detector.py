@@ -1,90 +1,563 @@
-"""源码检测模块：文本 + AST 解析检测类/方法调用。"""
+"""源码检测模块：文本预筛 + 词法扫描检测类/方法调用。"""
 
+import base64
+import hashlib
 import logging
+import mmap
+import multiprocessing
 import os
-import re
 import subprocess
-from typing import Dict, List
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 import javalang
+import orjson
 
+from src.utils import iter_files
 
-def _rg_files(repo_path: str, pattern: str) -> List[str]:
-    """优先用 ripgrep 获取候选 Java 文件列表。"""
-    cmd = ["rg", "-l", pattern, repo_path]
+# 兜底扫描 Java 文件时不进入的目录（target 中可能残留上次构建生成的源码）
+JAVA_WALK_PRUNE_DIRS = frozenset({".git", ".svn", "target", "node_modules"})
+
+# 方法调用词法扫描：标识符前为这些 token（或类型/标识符/修饰符）时，"标识符(" 是声明/对象创建/注解而非调用
+_NON_INVOCATION_PREFIXES = frozenset({"new", "@", "void", "]"})
+# 形参列表后紧跟这些 token 说明是方法/构造器声明
+_DECLARATION_BODY_STARTS = frozenset({"{", "throws"})
+_DECLARATION_PREFIX_TYPES = (
+    javalang.tokenizer.Identifier,
+    javalang.tokenizer.BasicType,
+    javalang.tokenizer.Modifier,
+)
+# 类型参数右括号（">>" 等为嵌套泛型合并后的 token）
+_TYPE_ARGUMENT_CLOSERS = {">": 1, ">>": 2, ">>>": 3}
+# 类型参数列表中允许出现的非标识符 token，出现其它 token 说明 "<"/">" 是比较运算符
+_TYPE_ARGUMENT_TOKENS = frozenset({".", ",", "?", "extends", "super", "&", "[", "]", "<", ">", ">>", ">>>"})
+# 泛型返回类型之前可能出现的 token（修饰符、注解与标识符另行判断）
+_RETURN_TYPE_PREFIXES = frozenset({";", "{", "}", ">", ")"})
+# 这些关键字之后的 "{" 开启类/接口/枚举体
+_TYPE_DECLARATION_KEYWORDS = frozenset({"class", "interface", "enum"})
+
+# 调用扫描进程池（由 set_parse_workers 配置，首次使用时创建，多个线程共用）
+_PARSE_WORKERS = 0
+_PARSE_POOL: Optional[ProcessPoolExecutor] = None
+_PARSE_POOL_LOCK = threading.Lock()
+
+# 进程内方法调用 LRU：只以内容摘要为键，不保留文件内容本身
+_INVOCATIONS_LRU_SIZE = 2048
+_INVOCATIONS_LRU: "OrderedDict[str, Tuple[Tuple[Optional[str], str], ...]]" = OrderedDict()
+_INVOCATIONS_LRU_LOCK = threading.Lock()
+
+
+def _rg_text(field: Dict) -> Optional[str]:
+    """提取 rg --json 中的文本字段（非 UTF-8 内容以 base64 形式给出）。"""
+    if "text" in field:
+        return field["text"]
+    if "bytes" in field:
+        return base64.b64decode(field["bytes"]).decode("utf-8", errors="ignore")
+    return None
+
+
+def _rg_matches(repo_path: str, patterns: List[str], timeout: int = 30) -> Optional[Dict[str, List[str]]]:
+    """用一次 rg --json 扫描获取命中任一关键字的 Java 文件及其命中行。
+
+    返回 {文件路径: [命中行, ...]}（按行号顺序）；rg 不可用或执行失败时返回 None。
+    """
+    cmd = [
+        "rg", "--json", "-F", "--type", "java", "--max-filesize", "2M",
+        "--threads", str(os.cpu_count() or 1),
+    ]
+    for pattern in patterns:
+        cmd.extend(["-e", pattern])
+    cmd.append(repo_path)
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
     except FileNotFoundError:
         logging.warning("未找到 rg 工具，回退到 os.walk 扫描")
-        return []
-    if result.returncode not in (0, 1):
-        return []
-    return [line.strip() for line in result.stdout.splitlines() if line.strip().endswith(".java")]
+        return None
+
+    timer = threading.Timer(timeout, proc.kill)
+    timer.start()
+    matches: Dict[str, List[str]] = {}
+    try:
+        # rg --json 的输出总是合法 UTF-8，直接把字节行交给 orjson 解析
+        for raw in proc.stdout:
+            event = orjson.loads(raw)
+            if event.get("type") != "match":
+                continue
+            data = event["data"]
+            path = _rg_text(data["path"])
+            line = _rg_text(data["lines"])
+            if path is None or line is None:
+                continue
+            matches.setdefault(path, []).append(line.rstrip("\r\n"))
+        proc.wait()
+    finally:
+        timer.cancel()
+        proc.stdout.close()
+    if proc.returncode not in (0, 1):
+        return None
+    return matches
 
 
 def _fallback_java_files(repo_path: str) -> List[str]:
     """没有 rg 时的兜底扫描。"""
-    java_files = []
-    for root, _, files in os.walk(repo_path):
-        for name in files:
-            if name.endswith(".java"):
-                java_files.append(os.path.join(root, name))
-    return java_files
+    return list(iter_files(repo_path, lambda name: name.endswith(".java"), JAVA_WALK_PRUNE_DIRS))
 
 
 def _extract_method_name(signature: str) -> str:
     """从方法签名里解析方法名。"""
     if not signature:
         return ""
-    name = signature.split("(")[0]
-    return name.split(":")[0].strip()
+    name = signature.partition("(")[0]
+    return name.partition(":")[0].strip()
 
 
-def detect_usage(repo_path: str, target_class: str, target_method: str) -> Dict[str, object]:
-    """检测目标类与方法是否真实调用。"""
-    short_class = target_class.split(".")[-1] if target_class else ""
-    method_name = _extract_method_name(target_method)
-    class_hit_files: List[str] = []
-    method_snippets: List[str] = []
-    uses_class = False
-    uses_method = False
-
-    files = _rg_files(repo_path, short_class) if short_class else []
-    if not files:
-        files = _fallback_java_files(repo_path)
-
-    for file_path in files:
-        try:
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as handle:
-                content = handle.read()
-        except Exception:
+def _parse_invocations(content: str) -> Tuple[Tuple[Optional[str], str], ...]:
+    """对 Java 源码做词法扫描并返回所有方法调用 (qualifier, member)，词法错误返回空元组。
+
+    只需判断调用是否存在，不必构建完整 AST：标识符后紧跟 "(" 即视为调用，排除方法/构造器声明、
+    对象创建与注解；qualifier 为紧邻的 "a.b." 标识符链，链前是调用结果等表达式时为 None，无限定时为空字符串。
+    修改提取规则时需递增 intermediate._JAVA_AST_CACHE_VERSION，使磁盘缓存失效。
+    """
+    try:
+        tokens = list(javalang.tokenizer.tokenize(content))
+    except Exception:
+        return ()
+    values = [token.value for token in tokens]
+    member_headers = _member_header_flags(tokens, values)
+    invocations = []
+    for index in range(1, len(tokens) - 1):
+        token = tokens[index]
+        if values[index + 1] != "(" or not isinstance(token, javalang.tokenizer.Identifier):
+            continue
+        if member_headers[index]:
+            # 类型体中成员声明部分的 "标识符("：方法/构造器/注解元素声明或枚举常量
             continue
-        if short_class and short_class not in content:
+        cursor = index - 1
+        if values[cursor] in _TYPE_ARGUMENT_CLOSERS:
+            # 找到匹配的 "<" 且其前为 "." 时是 Collections.<T>emptyList() 形式的显式泛型调用，
+            # 其前为声明上下文中的类型名时是 List<String> parse(...) 形式的方法声明；否则 ">" 是比较/移位运算符
+            type_start = _skip_type_arguments(tokens, values, cursor)
+            if type_start >= 1 and values[type_start] == ".":
+                cursor = type_start
+            elif type_start >= 1 and _is_return_type_start(tokens, values, type_start):
+                continue
+        previous = tokens[cursor]
+        if values[cursor] in _NON_INVOCATION_PREFIXES or isinstance(previous, _DECLARATION_PREFIX_TYPES):
             continue
-        class_hit_files.append(os.path.relpath(file_path, repo_path))
-        uses_class = True
-        if method_name and method_name in content:
-            snippet_lines = []
-            for line in content.splitlines():
-                if method_name in line and short_class in line:
-                    snippet_lines.append(line.strip())
-            method_snippets.extend(snippet_lines[:3])
+        if values[_skip_parentheses(values, index + 1)] in _DECLARATION_BODY_STARTS:
+            continue
+        qualifier = ""
+        if values[cursor] == ".":
+            parts = []
+            while cursor >= 1 and values[cursor] == "." and isinstance(tokens[cursor - 1], javalang.tokenizer.Identifier):
+                parts.append(values[cursor - 1])
+                cursor -= 2
+            if values[cursor] in _NON_INVOCATION_PREFIXES:
+                # new a.b.C(...) / @a.b.Anno(...)
+                continue
+            qualifier = ".".join(reversed(parts)) if parts and values[cursor] != "." else None
+        invocations.append((qualifier, token.value))
+    return tuple(invocations)
+
+
+def _member_header_flags(tokens: list, values: List[str]) -> List[bool]:
+    """标记直接位于类型体成员声明部分（未进入括号、方法体，且尚未出现字段初始化 "="）的 token。
+
+    维护花括号上下文栈：类/接口/枚举声明与匿名类的 "{" 开启类型体，其余 "{" 开启代码块；
+    类型体中每个成员以 ";" 结束，"=" 之后是字段初始化表达式，其中的 "标识符(" 才可能是调用。
+    """
+    flags = [False] * len(values)
+    # 每层上下文：[是否类型体, 开启时的圆括号深度, 当前成员是否已出现 "="]
+    stack = [[False, 0, False]]
+    paren_depth = 0
+    pending_type = False
+    for index, value in enumerate(values):
+        context = stack[-1]
+        at_member_level = context[0] and paren_depth == context[1]
+        if at_member_level and not context[2]:
+            flags[index] = True
+        if value == "(":
+            paren_depth += 1
+        elif value == ")":
+            paren_depth -= 1
+        elif value == "{":
+            is_type_body = pending_type or _opens_anonymous_class(tokens, values, index)
+            stack.append([is_type_body, paren_depth, False])
+            pending_type = False
+        elif value == "}":
+            if len(stack) > 1:
+                stack.pop()
+        elif value == ";":
+            pending_type = False
+            if at_member_level:
+                context[2] = False
+        elif value == "=" and at_member_level:
+            context[2] = True
+        elif value in _TYPE_DECLARATION_KEYWORDS and (index == 0 or values[index - 1] != "."):
+            pending_type = True
+    return flags
+
+
+def _opens_anonymous_class(tokens: list, values: List[str], index: int) -> bool:
+    """判断 values[index] 处的 "{" 是否为 new Foo<...>(...) { 形式的匿名类体。"""
+    cursor = index - 1
+    if cursor < 0 or values[cursor] != ")":
+        return False
+    depth = 0
+    while cursor >= 0:
+        if values[cursor] == ")":
+            depth += 1
+        elif values[cursor] == "(":
+            depth -= 1
+            if depth == 0:
+                break
+        cursor -= 1
+    cursor -= 1
+    if cursor >= 0 and values[cursor] in _TYPE_ARGUMENT_CLOSERS:
+        cursor = _skip_type_arguments(tokens, values, cursor)
+    while cursor >= 1 and isinstance(tokens[cursor], javalang.tokenizer.Identifier) and values[cursor - 1] == ".":
+        cursor -= 2
+    return cursor >= 1 and isinstance(tokens[cursor], javalang.tokenizer.Identifier) and values[cursor - 1] == "new"
+
+
+def _is_return_type_start(tokens: list, values: List[str], index: int) -> bool:
+    """判断 tokens[index]（类型参数 "<" 之前的 token）是否为声明上下文中的（可带包名的）类型名。"""
+    if not isinstance(tokens[index], javalang.tokenizer.Identifier):
+        return False
+    while index >= 2 and values[index - 1] == "." and isinstance(tokens[index - 2], javalang.tokenizer.Identifier):
+        index -= 2
+    if index == 0:
+        return True
+    previous = tokens[index - 1]
+    return values[index - 1] in _RETURN_TYPE_PREFIXES or isinstance(
+        previous, (javalang.tokenizer.Modifier, javalang.tokenizer.Identifier)
+    )
+
+
+def _skip_type_arguments(tokens: list, values: List[str], index: int) -> int:
+    """从 values[index] 处的 ">" 向前跳过整段类型参数，返回 "<" 之前 token 的下标。
+
+    遇到类型参数中不可能出现的 token（运算符、括号、字面量等）或找不到匹配的 "<" 时返回 -1。
+    """
+    depth = 0
+    while index >= 0:
+        value = values[index]
+        if value in _TYPE_ARGUMENT_CLOSERS:
+            depth += _TYPE_ARGUMENT_CLOSERS[value]
+        elif value == "<":
+            depth -= 1
+            if depth == 0:
+                return index - 1
+        elif value not in _TYPE_ARGUMENT_TOKENS and not isinstance(
+            tokens[index], (javalang.tokenizer.Identifier, javalang.tokenizer.BasicType)
+        ):
+            return -1
+        index -= 1
+    return -1
+
+
+def _skip_parentheses(values: List[str], index: int) -> int:
+    """从 values[index] 处的 "(" 向后跳到与之匹配的 ")"，返回其后一个 token 的下标。"""
+    depth = 0
+    last = len(values) - 1
+    while index < last:
+        value = values[index]
+        if value == "(":
+            depth += 1
+        elif value == ")":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+        index += 1
+    return last
+
+
+def _cached_invocations(digest: str, content: str, cache=None) -> Tuple[Tuple[Optional[str], str], ...]:
+    """按内容摘要获取方法调用列表：先查进程内 LRU，再查磁盘缓存，均未命中才扫描调用。"""
+    with _INVOCATIONS_LRU_LOCK:
+        invocations = _INVOCATIONS_LRU.get(digest)
+        if invocations is not None:
+            _INVOCATIONS_LRU.move_to_end(digest)
+            return invocations
+    stored = cache.load_java_invocations(digest) if cache is not None else None
+    if stored is not None:
+        invocations = tuple((qualifier, member) for qualifier, member in stored)
+    else:
+        invocations = _parse_invocations(content)
+        if cache is not None:
+            cache.save_java_invocations(digest, invocations)
+    with _INVOCATIONS_LRU_LOCK:
+        _INVOCATIONS_LRU[digest] = invocations
+        while len(_INVOCATIONS_LRU) > _INVOCATIONS_LRU_SIZE:
+            _INVOCATIONS_LRU.popitem(last=False)
+    return invocations
+
+
+def _parse_job(digest: str, content: str) -> Tuple[Tuple[Optional[str], str], ...]:
+    """子进程中执行的调用扫描任务（各子进程各自维护 LRU）。"""
+    return _cached_invocations(digest, content)
+
+
+def set_parse_workers(workers: int) -> None:
+    """设置调用扫描子进程数量；不大于 1 时在当前进程内串行解析。"""
+    global _PARSE_WORKERS
+    shutdown_parse_pool()
+    _PARSE_WORKERS = max(0, workers)
+
+
+def shutdown_parse_pool() -> None:
+    """关闭调用扫描进程池。"""
+    global _PARSE_POOL
+    with _PARSE_POOL_LOCK:
+        if _PARSE_POOL is not None:
+            _PARSE_POOL.shutdown(cancel_futures=True)
+            _PARSE_POOL = None
+
+
+def _get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """懒加载共享的进程池：javalang 解析是纯 Python 的 CPU 密集任务，线程无法并行。"""
+    global _PARSE_POOL
+    if _PARSE_WORKERS <= 1:
+        return None
+    with _PARSE_POOL_LOCK:
+        if _PARSE_POOL is None:
+            # spawn 避免在多线程进程中 fork 带来的锁状态问题
+            _PARSE_POOL = ProcessPoolExecutor(max_workers=_PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _PARSE_POOL
+
+
+def _prefilter_file(candidates, repo_path, file_path, contains, get_snippets, read_data) -> Optional[Dict]:
+    """对单个文件做低成本预筛，返回命中信息；需要调用扫描时附带内容与摘要。
+
+    contains(text, raw) 判断关键字（str 与 bytes 两种形式）是否出现在文件中，get_snippets(state)
+    返回同时包含方法名与类名的前 3 行，read_data() 读取文件全文；只有命中方法名的文件才会读取全文并解码。
+    """
+    hits = [state for state in candidates if not state["short_class"] or contains(state["short_class"], state["class_bytes"])]
+    if not hits:
+        return None
+
+    # 方法名字面量不在文件中时，既不可能有调用片段，也无需解码与扫描调用
+    method_hits = [state for state in hits if state["method_name"] and contains(state["method_name"], state["method_bytes"])]
+    record = {
+        "relative_path": os.path.relpath(file_path, repo_path),
+        "hits": hits,
+        "method_hits": method_hits,
+        "snippets": [get_snippets(state) for state in method_hits],
+        "digest": None,
+        "content": None,
+    }
+    if not method_hits:
+        return record
+
+    data = read_data()
+    if data is None:
+        return record
+    record["digest"] = hashlib.sha256(data).hexdigest()
+    record["content"] = data.decode("utf-8", errors="ignore")
+    return record
+
+
+def _read_file(file_path: str) -> Optional[bytes]:
+    try:
+        with open(file_path, "rb") as handle:
+            return handle.read()
+    except OSError:
+        return None
+
+
+def _apply_record(record: Dict, invocations) -> None:
+    """按文件顺序把预筛与调用扫描结果合并到仍未确认方法调用的目标上。"""
+    for state in record["hits"]:
+        if state["uses_method"]:
+            continue
+        state["class_hit_files"].append(record["relative_path"])
+        state["uses_class"] = True
+    pending = [
+        (state, snippet_lines)
+        for state, snippet_lines in zip(record["method_hits"], record["snippets"])
+        if not state["uses_method"]
+    ]
+    for state, snippet_lines in pending:
+        state["method_snippets"].update(dict.fromkeys(snippet_lines))
+    for state, _ in pending:
+        method_name = state["method_name"]
+        for qualifier, member in invocations:
+            if member == method_name:
+                state["uses_method"] = True
+                if qualifier:
+                    state["method_snippets"][f"{qualifier}.{member}(...)"] = None
+
+
+def _line_snippets(lines: List[str], state: Dict) -> List[str]:
+    method_name = state["method_name"]
+    short_class = state["short_class"]
+    return [line.strip() for line in lines if method_name in line and short_class in line][:3]
+
+
+def _mmap_snippets(mm: mmap.mmap, state: Dict) -> List[str]:
+    """只在方法名出现处取整行并检查类名，凑满 3 条即停止，不逐行扫描整个文件。"""
+    method_bytes = state["method_bytes"]
+    class_bytes = state["class_bytes"]
+    snippets = []
+    start = 0
+    while len(snippets) < 3:
+        index = mm.find(method_bytes, start)
+        if index == -1:
+            break
+        line_start = mm.rfind(b"\n", 0, index) + 1
+        line_end = mm.find(b"\n", index)
+        if line_end == -1:
+            line_end = len(mm)
+        line = mm[line_start:line_end]
+        if class_bytes in line:
+            snippets.append(line.strip().decode("utf-8", errors="ignore"))
+        start = line_end + 1
+    return snippets
+
+
+def _iter_file_inputs(repo_path: str, states: List[Dict]):
+    """产出 (文件路径, contains, get_snippets, read_data)：有 rg 时基于其命中行，否则逐个 mmap Java 文件。"""
+    matches = None
+    # 类名为空时任意文件都算命中，关键字无法覆盖，只能逐文件扫描
+    if states and all(state["short_class"] for state in states):
+        patterns = sorted(
+            {state["short_class"] for state in states} | {state["method_name"] for state in states if state["method_name"]}
+        )
+        matches = _rg_matches(repo_path, patterns)
+
+    if matches is not None:
+        # rg 已给出每个文件的命中行：只有同时命中方法名的文件才需要读取全文做调用扫描
+        for file_path in sorted(matches):
+            lines = matches[file_path]
+            hit_text = "\n".join(lines)
+            yield (
+                file_path,
+                (lambda text, raw, hit_text=hit_text: text in hit_text),
+                (lambda state, lines=lines: _line_snippets(lines, state)),
+                (lambda file_path=file_path: _read_file(file_path)),
+            )
+        return
+
+    for file_path in _fallback_java_files(repo_path):
+        # mmap 让关键字查找与片段正则直接在页缓存上进行，无需把整个文件复制成 Python 对象
         try:
-            tree = javalang.parse.parse(content)
-        except Exception:
+            with open(file_path, "rb") as handle:
+                if os.fstat(handle.fileno()).st_size == 0:
+                    # 空文件无法 mmap，只可能命中空类名
+                    yield file_path, (lambda text, raw: not raw), (lambda state: []), (lambda: b"")
+                    continue
+                with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    yield (
+                        file_path,
+                        (lambda text, raw, mm=mm: mm.find(raw) != -1),
+                        (lambda state, mm=mm: _mmap_snippets(mm, state)),
+                        (lambda mm=mm: mm[:]),
+                    )
+        except (OSError, ValueError):
             continue
-        if method_name:
-            for _, node in tree.filter(javalang.tree.MethodInvocation):
-                if node.member == method_name:
-                    uses_method = True
-                    if node.qualifier:
-                        method_snippets.append(f"{node.qualifier}.{node.member}(...)")
-        if uses_method:
+
+
+def _scan_serial(repo_path: str, states: List[Dict], cache=None) -> None:
+    for file_path, contains, get_snippets, read_data in _iter_file_inputs(repo_path, states):
+        # 已确认方法调用的目标不再继续扫描
+        active = [state for state in states if not state["uses_method"]]
+        if not active:
             break
+        record = _prefilter_file(active, repo_path, file_path, contains, get_snippets, read_data)
+        if record is None:
+            continue
+        invocations = ()
+        if record["content"] is not None:
+            invocations = _cached_invocations(record["digest"], record["content"], cache)
+        _apply_record(record, invocations)
+
+
+def _scan_parallel(repo_path: str, states: List[Dict], pool: ProcessPoolExecutor, cache=None) -> None:
+    """预筛在当前进程顺序进行，调用扫描提交到进程池；结果按文件顺序合并，保证与串行扫描一致。"""
+    window = 2 * _PARSE_WORKERS
+    pending = deque()
+
+    def apply_next() -> None:
+        record, job = pending.popleft()
+        if isinstance(job, Future):
+            invocations = job.result()
+            if cache is not None:
+                cache.save_java_invocations(record["digest"], invocations)
+        else:
+            invocations = job
+        _apply_record(record, invocations)
 
-    return {
-        "uses_target_class": uses_class,
-        "uses_target_method": uses_method,
-        "class_hit_files": class_hit_files,
-        "method_call_snippets": list(dict.fromkeys(method_snippets)),
-    }
\ No newline at end of file
+    try:
+        for file_path, contains, get_snippets, read_data in _iter_file_inputs(repo_path, states):
+            candidates = [state for state in states if not state["uses_method"]]
+            if not candidates:
+                break
+            record = _prefilter_file(candidates, repo_path, file_path, contains, get_snippets, read_data)
+            if record is None:
+                continue
+            job = ()
+            if record["content"] is not None:
+                stored = cache.load_java_invocations(record["digest"]) if cache is not None else None
+                if stored is not None:
+                    job = tuple((qualifier, member) for qualifier, member in stored)
+                else:
+                    job = pool.submit(_parse_job, record["digest"], record["content"])
+                # 内容已交给子进程，合并阶段只需要摘要
+                record["content"] = None
+            pending.append((record, job))
+            while len(pending) > window:
+                apply_next()
+        while pending and any(not state["uses_method"] for state in states):
+            apply_next()
+    finally:
+        for _, job in pending:
+            if isinstance(job, Future):
+                job.cancel()
+
+
+def detect_usage_batch(repo_path: str, targets: List[Tuple[str, str]], cache=None) -> List[Dict[str, object]]:
+    """批量检测多个 (类, 方法) 目标是否真实调用。
+
+    仓库只遍历一次、每个文件只读取一次，所有目标共用同一份文件内容与调用扫描结果，
+    返回结果与 targets 顺序一致。传入 cache（IntermediateCache）时，按文件内容摘要
+    持久化调用扫描结果，重复扫描相同文件时无需再次解析。已通过 set_parse_workers
+    启用进程池时，调用扫描并行执行。
+    """
+    states = []
+    for target_class, target_method in targets:
+        short_class = target_class.rpartition(".")[2] if target_class else ""
+        method_name = _extract_method_name(target_method)
+        states.append({
+            "short_class": short_class,
+            "class_bytes": short_class.encode("utf-8"),
+            "method_name": method_name,
+            "method_bytes": method_name.encode("utf-8"),
+            "class_hit_files": [],
+            # dict 作为有序集合，插入时即完成去重
+            "method_snippets": {},
+            "uses_class": False,
+            "uses_method": False,
+        })
+
+    pool = _get_parse_pool()
+    if pool is None:
+        _scan_serial(repo_path, states, cache)
+    else:
+        _scan_parallel(repo_path, states, pool, cache)
+
+    return [
+        {
+            "uses_target_class": state["uses_class"],
+            "uses_target_method": state["uses_method"],
+            "class_hit_files": state["class_hit_files"],
+            "method_call_snippets": list(state["method_snippets"]),
+        }
+        for state in states
+    ]
+
+
+def detect_usage(repo_path: str, target_class: str, target_method: str, cache=None) -> Dict[str, object]:
+    """检测目标类与方法是否真实调用。"""
+    return detect_usage_batch(repo_path, [(target_class, target_method)], cache=cache)[0]
@@ -3,9 +3,10 @@
 import logging
 import time
 import urllib
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Set
 
-import requests
+from src.utils import make_http_session
 
 
 class GitHubSearcher:
@@ -13,7 +14,8 @@ class GitHubSearcher:
 
     def __init__(self, token: str | None):
         self.token = token
-        self.session = requests.Session()
+        # 网络错误、429、5xx 由会话层自动退避重试；403 限额仍在 search_repositories 中按重置时间等待
+        self.session = make_http_session()
         if token:
             self.session.headers.update({"Authorization": f"token {token}"})
         self.session.headers.update({"Accept": "application/vnd.github+json"})
@@ -39,43 +41,26 @@ class GitHubSearcher:
 
         return repo
 
-    def _deduplicate_repos(self, repos: List[Dict]) -> List[Dict]:
-        """去重仓库列表，优先保留非 fork 仓库。"""
-        repo_dict = {}
-        original_repos = []
-
-        # 先处理所有仓库，获取原始仓库
+    @staticmethod
+    def _with_parents(repos: List[Dict]):
+        """依次产出每个仓库；fork 仓库若附带父仓库信息，紧随其后产出父仓库。"""
         for repo in repos:
-            full_name = repo["full_name"].lower()
-            if full_name not in repo_dict:
-                repo_dict[full_name] = repo
-
-            # 如果是 fork，也记录其父仓库
+            yield repo
             if repo.get("fork", False) and "parent" in repo:
-                parent = repo["parent"]
-                parent_name = parent["full_name"].lower()
-                if parent_name not in repo_dict:
-                    repo_dict[parent_name] = parent
+                yield repo["parent"]
 
-        # 去重：按 full_name 去重，优先保留非 fork 的
+    def _deduplicate_repos(self, repos: List[Dict]) -> List[Dict]:
+        """单次遍历去重仓库列表：活跃仓库在前、已归档在后，各自优先保留非 fork 仓库。"""
         seen_names: Set[str] = set()
-        deduplicated = []
-
-        # 先添加非 fork 仓库
-        for repo in repo_dict.values():
+        # (archived, fork) 四个分桶，合并顺序即最终优先级
+        buckets: Dict[tuple, List[Dict]] = {key: [] for key in [(False, False), (False, True), (True, False), (True, True)]}
+        for repo in self._with_parents(repos):
             name = repo["full_name"].lower()
-            if name not in seen_names and not repo.get("fork", False):
-                deduplicated.append(repo)
-                seen_names.add(name)
-
-        # 再添加剩余的 fork 仓库（如果还没有该仓库）
-        for repo in repo_dict.values():
-            name = repo["full_name"].lower()
-            if name not in seen_names:
-                deduplicated.append(repo)
-                seen_names.add(name)
-
-        return deduplicated
+            if name in seen_names:
+                continue
+            seen_names.add(name)
+            buckets[(bool(repo.get("archived", False)), bool(repo.get("fork", False)))].append(repo)
+        return [repo for bucket in buckets.values() for repo in bucket]
 
     def search_repositories(self, query: str, max_repos: int = None) -> List[dict]:
         """按查询语句返回候选仓库列表，自动处理分页和去重。
@@ -131,13 +116,8 @@ class GitHubSearcher:
 
             page += 1
 
-        # 去重处理
-        deduplicated = self._deduplicate_repos(results)
-
-        # 过滤掉已归档的仓库，优先选择活跃仓库
-        active_repos = [repo for repo in deduplicated if not repo.get("archived", False)]
-        archived_repos = [repo for repo in deduplicated if repo.get("archived", False)]
-        final_repos = active_repos + archived_repos
+        # 去重处理：已归档的仓库排在活跃仓库之后
+        final_repos = self._deduplicate_repos(results)
 
         # 应用最大数量限制（如果指定）
         if max_repos is not None:
@@ -146,3 +126,38 @@ class GitHubSearcher:
         logging.info("Found %d unique repositories after deduplication (from %d total results)",
                      len(final_repos), len(results))
         return final_repos
+
+
+def search_many(queries: Dict[str, str], tokens: List[str], max_repos: int = None) -> Dict[str, List[dict]]:
+    """使用多个 token 并发执行多条搜索查询。
+
+    每个 token 对应一个独立的 GitHubSearcher（复用各自的连接池），查询按轮询方式
+    分配给各 token；同一 token 下的查询串行执行，以遵守其搜索限额。
+
+    Args:
+        queries: 键到查询字符串的映射
+        tokens: GitHub token 列表（空列表表示匿名访问）
+        max_repos: 每条查询的最大仓库数量限制
+
+    Returns:
+        键到仓库列表的映射
+    """
+    searchers = [GitHubSearcher(token) for token in (tokens or [None])]
+    buckets: List[List[str]] = [[] for _ in searchers]
+    for index, key in enumerate(queries):
+        buckets[index % len(searchers)].append(key)
+
+    def run_bucket(searcher: GitHubSearcher, keys: List[str]) -> Dict[str, List[dict]]:
+        bucket_results = {}
+        for key in keys:
+            try:
+                bucket_results[key] = searcher.search_repositories(queries[key], max_repos=max_repos)
+            except Exception as e:
+                logging.error("GitHub search failed for %s: %s", key, e)
+        return bucket_results
+
+    results: Dict[str, List[dict]] = {}
+    with ThreadPoolExecutor(max_workers=len(searchers)) as executor:
+        for bucket_results in executor.map(run_bucket, searchers, buckets):
+            results.update(bucket_results)
+    return results
@@ -1,11 +1,39 @@
 """中间结果缓存管理模块。"""
 
-import json
+import hashlib
 import logging
 import os
 import shutil
+import sqlite3
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+# 人工查看较多的缓存保留缩进；克隆状态文件为热路径，紧凑输出
+_JSON_OPTS = orjson.OPT_NON_STR_KEYS
+_JSON_OPTS_INDENT = orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2
+
+# 克隆状态 JSONL 每行记录的仓库名字段
+_CLONE_STATUS_REPO_KEY = "_repo"
+# 冗余行（被后续行覆盖的旧状态）超过该数量且超过总行数一半时压缩重写
+_CLONE_STATUS_COMPACT_SLACK = 256
+
+# 方法调用缓存的版本（记录在 SQLite user_version 中）；调用提取规则变化时递增，旧条目在打开时清空
+_JAVA_AST_CACHE_VERSION = 2
+
+
+def _read_json(path: Path) -> Any:
+    """读取 JSON 文件。"""
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def _write_json(path: Path, obj: Any, indent: bool = True) -> None:
+    """写入 JSON 文件（UTF-8，不转义非 ASCII 字符）。"""
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(obj, option=_JSON_OPTS_INDENT if indent else _JSON_OPTS))
 
 
 class IntermediateCache:
@@ -17,9 +45,18 @@ class IntermediateCache:
         self.clone_dir = self.base_dir / "clone_status"
         self.dependency_dir = self.base_dir / "dependency_analysis"
         self.usage_dir = self.base_dir / "usage_analysis"
+        self.pom_dir = self.base_dir / "pom_cache"
+        self.repo_meta_dir = self.base_dir / "repo_meta"
+        self.java_ast_db_path = self.base_dir / "java_ast.sqlite"
+        self._java_ast_db = None
+        self._java_ast_lock = threading.Lock()
+        # 克隆状态写穿缓存：每个 CVE 的状态文件只从磁盘读取一次
+        self._clone_status_cache: Dict[str, Dict] = {}
+        self._clone_status_lines: Dict[str, int] = {}
+        self._clone_status_lock = threading.RLock()
         
         # 创建所有必要的目录
-        for dir_path in [self.search_dir, self.clone_dir, self.dependency_dir, self.usage_dir]:
+        for dir_path in [self.search_dir, self.clone_dir, self.dependency_dir, self.usage_dir, self.pom_dir, self.repo_meta_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
     
     def get_search_cache_path(self, cve_number: str) -> Path:
@@ -33,8 +70,7 @@ class IntermediateCache:
     def save_search_results(self, cve_number: str, results: List[Dict]) -> None:
         """保存搜索结果到缓存。"""
         cache_path = self.get_search_cache_path(cve_number)
-        with open(cache_path, "w", encoding="utf-8") as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        _write_json(cache_path, results)
         logging.info("已保存搜索结果 %s 到 %s", cve_number, cache_path)
     
     def load_search_results(self, cve_number: str) -> Optional[List[Dict]]:
@@ -44,8 +80,7 @@ class IntermediateCache:
             return None
         
         try:
-            with open(cache_path, "r", encoding="utf-8") as f:
-                results = json.load(f)
+            results = _read_json(cache_path)
             logging.info("已加载缓存的搜索结果，CVE编号: %s", cve_number)
             return results
         except Exception as e:
@@ -53,29 +88,68 @@ class IntermediateCache:
             return None
     
     def get_clone_status_path(self, cve_number: str) -> Path:
-        """获取 CVE 克隆状态缓存路径（单个文件包含所有仓库）。"""
-        return self.clone_dir / f"{cve_number}.json"
+        """获取 CVE 克隆状态缓存路径（单个追加写入的 JSONL 文件包含所有仓库，后写入的行覆盖先前状态）。"""
+        return self.clone_dir / f"{cve_number}.jsonl"
     
-    def _load_clone_status_file(self, cve_number: str) -> Dict:
-        """加载 CVE 的完整克隆状态文件。"""
+    def _read_clone_status_file(self, cve_number: str) -> Dict:
+        """从磁盘读取 CVE 的完整克隆状态，兼容旧版整体写入的 .json 文件（读取后转换为 JSONL）。"""
         status_path = self.get_clone_status_path(cve_number)
-        if not status_path.exists():
-            return {}
-        
-        try:
-            with open(status_path, "r", encoding="utf-8") as f:
-                status_data = json.load(f)
+        legacy_path = self.clone_dir / f"{cve_number}.json"
+        status_data: Dict[str, Dict] = {}
+        line_count = 0
+        if status_path.exists():
+            try:
+                with open(status_path, "rb") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            status = orjson.loads(line)
+                        except orjson.JSONDecodeError:
+                            # 进程崩溃可能留下半行，忽略即可
+                            logging.warning("跳过损坏的克隆状态行，CVE编号: %s", cve_number)
+                            continue
+                        repo_name = status.pop(_CLONE_STATUS_REPO_KEY, None) if isinstance(status, dict) else None
+                        if repo_name is None:
+                            logging.warning("跳过缺少仓库名的克隆状态行，CVE编号: %s", cve_number)
+                            continue
+                        status_data[repo_name] = status
+                        line_count += 1
+            except Exception as e:
+                logging.warning("加载克隆状态文件失败，CVE编号: %s，错误: %s", cve_number, e)
+        elif legacy_path.exists():
+            try:
+                status_data = _read_json(legacy_path)
+                self._save_clone_status_file(cve_number, status_data)
+                legacy_path.unlink()
+                line_count = len(status_data)
+            except Exception as e:
+                logging.warning("加载克隆状态文件失败，CVE编号: %s，错误: %s", cve_number, e)
+        self._clone_status_lines[cve_number] = line_count
+        return status_data
+    
+    def _load_clone_status_file(self, cve_number: str) -> Dict:
+        """加载 CVE 的完整克隆状态（首次从磁盘读取，之后命中内存缓存）。"""
+        with self._clone_status_lock:
+            status_data = self._clone_status_cache.get(cve_number)
+            if status_data is None:
+                status_data = self._read_clone_status_file(cve_number)
+                self._clone_status_cache[cve_number] = status_data
             return status_data
-        except Exception as e:
-            logging.warning("加载克隆状态文件失败，CVE编号: %s，错误: %s", cve_number, e)
-            return {}
+    
+    @staticmethod
+    def _clone_status_line(repo_name: str, status: Dict) -> bytes:
+        return orjson.dumps({**status, _CLONE_STATUS_REPO_KEY: repo_name}, option=_JSON_OPTS) + b"\n"
     
     def _save_clone_status_file(self, cve_number: str, status_data: Dict) -> None:
-        """保存 CVE 的完整克隆状态文件。"""
+        """压缩重写 CVE 的完整克隆状态文件（先写临时文件再 os.replace，崩溃时不会留下半截文件）。"""
         status_path = self.get_clone_status_path(cve_number)
-        with open(status_path, "w", encoding="utf-8") as f:
-            json.dump(status_data, f, ensure_ascii=False, indent=2)
-        logging.debug("已保存克隆状态文件，CVE编号: %s", cve_number)
+        tmp_path = status_path.with_name(status_path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(self._clone_status_line(repo_name, status) for repo_name, status in status_data.items()))
+        os.replace(tmp_path, status_path)
+        self._clone_status_lines[cve_number] = len(status_data)
+        logging.debug("已压缩克隆状态文件，CVE编号: %s", cve_number)
     
     def load_clone_status(self, cve_number: str, repo_name: str) -> Optional[Dict]:
         """加载特定仓库的克隆状态。"""
@@ -83,10 +157,17 @@ class IntermediateCache:
         return status_data.get(repo_name)
     
     def save_clone_status(self, cve_number: str, repo_name: str, status: Dict) -> None:
-        """保存特定仓库的克隆状态（追加到 CVE 文件中）。"""
-        status_data = self._load_clone_status_file(cve_number)
-        status_data[repo_name] = status
-        self._save_clone_status_file(cve_number, status_data)
+        """保存特定仓库的克隆状态（追加一行到 CVE 文件中，冗余行过多时压缩）。"""
+        with self._clone_status_lock:
+            status_data = self._load_clone_status_file(cve_number)
+            status_data[repo_name] = status
+            with open(self.get_clone_status_path(cve_number), "ab") as f:
+                f.write(self._clone_status_line(repo_name, status))
+            line_count = self._clone_status_lines.get(cve_number, 0) + 1
+            self._clone_status_lines[cve_number] = line_count
+            stale_lines = line_count - len(status_data)
+            if stale_lines >= _CLONE_STATUS_COMPACT_SLACK and line_count > 2 * len(status_data):
+                self._save_clone_status_file(cve_number, status_data)
         logging.debug("已保存仓库状态，CVE: %s，仓库: %s", cve_number, repo_name)
     
     def should_process_repo(self, cve_number: str, repo_name: str) -> bool:
@@ -152,8 +233,7 @@ class IntermediateCache:
             return None
         
         try:
-            with open(cache_path, "r", encoding="utf-8") as f:
-                cache_data = json.load(f)
+            cache_data = _read_json(cache_path)
             logging.info("已加载 Library 缓存，Library: %s", library_key)
             return cache_data
         except Exception as e:
@@ -164,6 +244,97 @@ class IntermediateCache:
         """保存 Library 级别缓存。"""
         cache_path = self.get_library_cache_path(library_key)
         cache_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(cache_path, "w", encoding="utf-8") as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
-        logging.info("已保存 Library 缓存，Library: %s", library_key)
\ No newline at end of file
+        _write_json(cache_path, cache_data)
+        logging.info("已保存 Library 缓存，Library: %s", library_key)
+    # pom 解析结果缓存（按 pom 内容摘要 + 依赖坐标）
+    def get_pom_cache_path(self, cache_key: str) -> Path:
+        """获取 pom 解析结果缓存路径。"""
+        return self.pom_dir / f"{cache_key.replace('/', '__')}.json"
+
+    def load_pom_resolution(self, cache_key: str) -> Optional[Dict]:
+        """加载 pom 解析结果缓存。"""
+        cache_path = self.get_pom_cache_path(cache_key)
+        if not cache_path.exists():
+            return None
+
+        try:
+            return _read_json(cache_path)
+        except Exception as e:
+            logging.warning("加载 pom 解析缓存失败: %s，错误: %s", cache_key, e)
+            return None
+
+    def save_pom_resolution(self, cache_key: str, dep_info: Dict) -> None:
+        """保存 pom 解析结果缓存。"""
+        cache_path = self.get_pom_cache_path(cache_key)
+        _write_json(cache_path, dep_info)
+        logging.debug("已保存 pom 解析缓存: %s", cache_key)
+
+    # 仓库元信息缓存（按仓库 URL + 提交哈希：仓库大小、pom.xml 相对路径等）
+    def get_repo_meta_path(self, repo_url: str, commit: str) -> Path:
+        """获取仓库元信息缓存路径。"""
+        url_digest = hashlib.sha1(repo_url.encode("utf-8")).hexdigest()[:16]
+        return self.repo_meta_dir / f"{url_digest}_{commit}.json"
+
+    def get_repo_meta(self, repo_url: str, commit: Optional[str]) -> Dict:
+        """加载仓库元信息缓存，未缓存时返回空字典。"""
+        if not commit:
+            return {}
+        cache_path = self.get_repo_meta_path(repo_url, commit)
+        if not cache_path.exists():
+            return {}
+
+        try:
+            return _read_json(cache_path)
+        except Exception as e:
+            logging.warning("加载仓库元信息缓存失败: %s@%s，错误: %s", repo_url, commit, e)
+            return {}
+
+    def set_repo_meta(self, repo_url: str, commit: Optional[str], **fields) -> None:
+        """合并保存仓库元信息（如 size_mb、pom_paths）。"""
+        if not commit:
+            return
+        meta = self.get_repo_meta(repo_url, commit)
+        meta.update(fields)
+        _write_json(self.get_repo_meta_path(repo_url, commit), meta)
+        logging.debug("已保存仓库元信息: %s@%s", repo_url, commit)
+
+    # Java 文件 AST 分析结果缓存（按文件内容 SHA-256，条目多，使用 SQLite 单文件存储）
+    def _get_java_ast_db(self) -> sqlite3.Connection:
+        """懒加载 AST 缓存数据库连接（调用方需持有 _java_ast_lock）。"""
+        if self._java_ast_db is None:
+            db = sqlite3.connect(str(self.java_ast_db_path), check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            if db.execute("PRAGMA user_version").fetchone()[0] != _JAVA_AST_CACHE_VERSION:
+                # 旧版本提取规则生成的调用列表不再可信
+                db.execute("DROP TABLE IF EXISTS java_invocations")
+                db.execute(f"PRAGMA user_version = {_JAVA_AST_CACHE_VERSION}")
+            db.execute("CREATE TABLE IF NOT EXISTS java_invocations (digest TEXT PRIMARY KEY, invocations TEXT NOT NULL)")
+            db.commit()
+            self._java_ast_db = db
+        return self._java_ast_db
+
+    def load_java_invocations(self, digest: str) -> Optional[List[List[Optional[str]]]]:
+        """加载 Java 文件的方法调用列表 [(qualifier, member), ...]，未缓存时返回 None。"""
+        try:
+            with self._java_ast_lock:
+                row = self._get_java_ast_db().execute(
+                    "SELECT invocations FROM java_invocations WHERE digest = ?", (digest,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logging.warning("读取 AST 缓存失败: %s", e)
+            return None
+        return orjson.loads(row[0]) if row else None
+
+    def save_java_invocations(self, digest: str, invocations) -> None:
+        """保存 Java 文件的方法调用列表。"""
+        try:
+            with self._java_ast_lock:
+                db = self._get_java_ast_db()
+                db.execute(
+                    "INSERT OR REPLACE INTO java_invocations (digest, invocations) VALUES (?, ?)",
+                    (digest, orjson.dumps(invocations).decode("utf-8")),
+                )
+                db.commit()
+        except sqlite3.Error as e:
+            logging.warning("写入 AST 缓存失败: %s", e)
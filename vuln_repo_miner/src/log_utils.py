@@ -2,28 +2,27 @@
 
 import logging
 
+# 预先生成的缩进前缀，避免每条日志重复拼接
+_INDENT_PREFIXES = tuple("  " * level for level in range(16))
+
+
+class IndentedLogger(logging.LoggerAdapter):
+    """带缩进的日志记录器：用法同 logging.Logger，额外接受 indent 关键字参数。
+
+    LoggerAdapter 先检查日志级别再调用 process，消息使用 %s 占位符延迟格式化，被过滤的日志零拼接开销。
+    """
 
-class IndentedLogger:
-    """带缩进的日志记录器。"""
-    
     def __init__(self, logger_name="IndentedLogger"):
-        self.logger = logging.getLogger(logger_name)
-    
-    def info(self, message, indent=0):
-        """带缩进的信息日志。"""
-        prefix = "  " * indent
-        self.logger.info(f"{prefix}{message}")
-    
-    def warning(self, message, indent=0):
-        """带缩进的警告日志。"""
-        prefix = "  " * indent
-        self.logger.warning(f"{prefix}{message}")
-    
-    def error(self, message, indent=0):
-        """带缩进的错误日志。"""
-        prefix = "  " * indent
-        self.logger.error(f"{prefix}{message}")
+        super().__init__(logging.getLogger(logger_name), {})
+
+    def process(self, msg, kwargs):
+        """按 indent 为消息添加缩进前缀。"""
+        indent = kwargs.pop("indent", 0)
+        if indent:
+            prefix = _INDENT_PREFIXES[indent] if indent < len(_INDENT_PREFIXES) else "  " * indent
+            msg = f"{prefix}{msg}"
+        return msg, kwargs
 
 
 # 全局日志实例
-logger = IndentedLogger()
\ No newline at end of file
+logger = IndentedLogger()
@@ -1,16 +1,75 @@
 """Maven 解析模块：版本规范解析、依赖解析与候选版本生成。"""
 
+import functools
+import hashlib
+import io
 import logging
+import operator
 import os
 import re
-import subprocess
-import xml.etree.ElementTree as ET
+import tempfile
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import requests
 from packaging.version import Version, InvalidVersion
 
+try:
+    # lxml 为可选依赖：解析速度明显快于标准库，且 API 与 ElementTree 兼容
+    from lxml import etree as ET
+
+    _HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+
+    _HAS_LXML = False
+
+from src.builder import maven_env
+from src.utils import iter_files, make_http_session, run_command
+
+# 查找 pom.xml 时不进入的目录（build/out 可能是真实模块名，不在此列）
+POM_WALK_PRUNE_DIRS = frozenset({".git", ".svn", ".idea", ".mvn", "target", "node_modules"})
+
+# 版本解析用到的正则统一预编译
+_SPEC_SPLIT_RE = re.compile(r"[，,]")
+_SPEC_TOKEN_RE = re.compile(r"(<=|>=|<|>|=)?\s*(.+)")
+# 约束运算符的首字符：不以这些字符开头的片段就是纯版本号，无需走正则
+_SPEC_OP_CHARS = frozenset("<>=")
+_INVALID_VERSION_CHARS_RE = re.compile(r"[^0-9A-Za-z.+-]")
+# 一次替换完成：_ -> .，[._]Beta/Alpha/RC 等 -> -beta/-alpha/-rc，其余 Beta/Alpha/RC 转小写
+_NORMALIZE_RE = re.compile(r"[._](Beta|beta|Alpha|alpha|RC|Rc|rc)|Beta|Alpha|RC|_")
+
+# 约束运算符 -> 比较函数
+_CONSTRAINT_OPS: Dict[str, Callable[[Version, Version], bool]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "=": operator.eq,
+}
+
+# pom 属性引用 ${name}；属性间循环引用时最多展开的层数
+_PROP_RE = re.compile(r"\$\{([^}]+)\}")
+_MAX_PROPERTY_DEPTH = 5
+
+# dependency:tree 文本输出中的依赖行：groupId:artifactId:type:version:scope
+_DEP_TREE_LINE_RE = re.compile(r"([\w.-]+):([\w.-]+):[^:\s]+:([^:\s]+):")
+
+# 每个仓库只执行一次 dependency:tree：按 (仓库路径, pom 文件签名) 缓存 {(groupId, artifactId): version}，
+# 最多保留最近使用的 _DEP_TREE_CACHE_SIZE 个仓库；每键锁仅在计算期间存在，计算结束即移除
+_DEP_TREE_CACHE_SIZE = 256
+_DEP_TREE_CACHE: "OrderedDict[Tuple[str, Tuple], Dict[Tuple[str, str], str]]" = OrderedDict()
+_DEP_TREE_LOCKS: Dict[Tuple[str, Tuple], threading.Lock] = {}
+_DEP_TREE_LOCKS_GUARD = threading.Lock()
+
+# Maven Central 查询复用同一个带重试的连接池（requests.Session 可在多线程间共享只读 GET）
+_HTTP_SESSION = make_http_session()
+_HTTP_SESSION.headers["Accept-Encoding"] = "gzip"
+# 远程 pom 预检只是尽力而为的预筛，少量快速重试即可，失败时照常克隆
+_PROBE_SESSION = make_http_session(retries=1, backoff_factor=0.5)
+
 
 @dataclass
 class VersionSpec:
@@ -19,35 +78,52 @@ class VersionSpec:
     preferred_versions: List[str] = field(default_factory=list)
     constraints: List[Tuple[str, str]] = field(default_factory=list)
     wildcards: List[str] = field(default_factory=list)
+    # 预解析的 (比较函数, Version) 与通配符前缀，首次比较时惰性填充
+    _parsed_constraints: Optional[List[Tuple[Callable[[Version, Version], bool], Version]]] = field(
+        default=None, repr=False, compare=False
+    )
+    _wildcard_prefixes: Optional[Tuple[str, ...]] = field(default=None, repr=False, compare=False)
+    # 可哈希的规范内容，作为 version_satisfies 结果缓存的键
+    _cache_key: Optional[Tuple] = field(default=None, repr=False, compare=False)
+
+
+def _normalize_token(match: "re.Match[str]") -> str:
+    qualifier = match.group(1)
+    if qualifier:
+        return "-" + qualifier.lower()
+    token = match.group(0)
+    return "." if token == "_" else token.lower()
 
 
 def normalize_version(raw: str) -> str:
     """规范化版本字符串（处理 rc/beta/alpha 等）。"""
-    cleaned = raw.strip()
-    cleaned = cleaned.replace("_", ".")
-    cleaned = cleaned.replace(".Beta", "-beta").replace(".beta", "-beta")
-    cleaned = cleaned.replace(".Alpha", "-alpha").replace(".alpha", "-alpha")
-    cleaned = cleaned.replace(".RC", "-rc").replace(".Rc", "-rc").replace(".rc", "-rc")
-    cleaned = cleaned.replace("Beta", "beta").replace("Alpha", "alpha").replace("RC", "rc")
-    return cleaned
+    return _NORMALIZE_RE.sub(_normalize_token, raw.strip())
 
 
+@functools.lru_cache(maxsize=None)
 def parse_version_spec(spec: str) -> VersionSpec:
-    """解析版本约束，支持逗号、中文逗号与通配符。"""
+    """解析版本约束，支持逗号、中文逗号与通配符。
+
+    结果按原始字符串缓存，同一约束在多个仓库间复用同一个对象，调用方不应修改返回值。
+    """
     raw = spec or ""
     version_spec = VersionSpec(raw=raw)
     if not raw:
         return version_spec
-    parts = re.split(r"[，,]", raw)
+    parts = _SPEC_SPLIT_RE.split(raw) if "，" in raw else raw.split(",")
     for part in parts:
         token = part.strip()
         if not token:
             continue
-        match = re.match(r"(<=|>=|<|>|=)?\s*(.+)", token)
-        if not match:
-            continue
-        op = match.group(1) or "="
-        version = match.group(2).strip()
+        if token[0] in _SPEC_OP_CHARS:
+            match = _SPEC_TOKEN_RE.match(token)
+            if not match:
+                continue
+            op = match.group(1) or "="
+            version = match.group(2).strip()
+        else:
+            op = "="
+            version = token
         if version.endswith(".x") or version.endswith(".*"):
             version_spec.wildcards.append(version)
         else:
@@ -56,28 +132,70 @@ def parse_version_spec(spec: str) -> VersionSpec:
     return version_spec
 
 
+@functools.lru_cache(maxsize=4096)
 def _version_key(version: str) -> Version:
-    """生成可比较的版本对象。"""
+    """生成可比较的版本对象（Version 不可变，可安全缓存复用）。"""
     normalized = normalize_version(version)
     try:
         return Version(normalized)
     except InvalidVersion:
-        normalized = re.sub(r"[^0-9A-Za-z.+-]", "", normalized)
+        normalized = _INVALID_VERSION_CHARS_RE.sub("", normalized)
         try:
             return Version(normalized)
         except InvalidVersion:
             return Version("0")
 
 
-def _compare_versions(left: str, right: str) -> int:
-    """比较两个版本字符串。"""
-    left_v = _version_key(left)
-    right_v = _version_key(right)
-    if left_v < right_v:
-        return -1
-    if left_v > right_v:
-        return 1
-    return 0
+def _prepare_spec(spec: VersionSpec) -> VersionSpec:
+    """惰性预解析约束版本与通配符前缀，避免逐次比较时重复构造 Version。
+
+    先在局部变量中算好全部字段，最后发布 _cache_key；并发调用者以 _cache_key 判断是否就绪，
+    不会读到只填了一半的对象。
+    """
+    if spec._cache_key is None:
+        wildcard_prefixes = tuple(
+            wildcard.replace(".x", ".").replace(".*", ".") for wildcard in spec.wildcards
+        )
+        parsed_constraints = [
+            (_CONSTRAINT_OPS[op], _version_key(constraint_version))
+            for op, constraint_version in spec.constraints
+        ]
+        cache_key = (
+            spec.raw,
+            tuple(spec.preferred_versions),
+            tuple(spec.constraints),
+            tuple(spec.wildcards),
+        )
+        spec._wildcard_prefixes = wildcard_prefixes
+        spec._parsed_constraints = parsed_constraints
+        spec._cache_key = cache_key
+    return spec
+
+
+def version_satisfies_v(version: str, version_v: Version, spec: VersionSpec) -> bool:
+    """判断版本是否满足约束（version_v 为调用方预先解析好的 Version）。"""
+    if not spec.raw:
+        return True
+    if not spec.constraints and not spec.wildcards:
+        return version in spec.preferred_versions
+    _prepare_spec(spec)
+    for compare, constraint_v in spec._parsed_constraints:
+        if not compare(version_v, constraint_v):
+            return False
+    return all(version.startswith(prefix) for prefix in spec._wildcard_prefixes)
+
+
+@functools.lru_cache(maxsize=65536)
+def _satisfies_cached(version: str, spec_key: Tuple) -> bool:
+    """按 (版本, 规范内容) 缓存判断结果；未命中时由规范内容重建 VersionSpec 计算。"""
+    raw, preferred_versions, constraints, wildcards = spec_key
+    spec = VersionSpec(
+        raw=raw,
+        preferred_versions=list(preferred_versions),
+        constraints=list(constraints),
+        wildcards=list(wildcards),
+    )
+    return version_satisfies_v(version, _version_key(version), spec)
 
 
 def version_satisfies(version: str, spec: VersionSpec) -> bool:
@@ -86,27 +204,12 @@ def version_satisfies(version: str, spec: VersionSpec) -> bool:
         return True
     if not spec.constraints and not spec.wildcards:
         return version in spec.preferred_versions
-    for op, constraint_version in spec.constraints:
-        cmp_value = _compare_versions(version, constraint_version)
-        if op == "<" and not (cmp_value < 0):
-            return False
-        if op == "<=" and not (cmp_value <= 0):
-            return False
-        if op == ">" and not (cmp_value > 0):
-            return False
-        if op == ">=" and not (cmp_value >= 0):
-            return False
-        if op == "=" and not (cmp_value == 0):
-            return False
-    for wildcard in spec.wildcards:
-        prefix = wildcard.replace(".x", ".").replace(".*", ".")
-        if not version.startswith(prefix):
-            return False
-    return True
+    return _satisfies_cached(version, _prepare_spec(spec)._cache_key)
 
 
-def fetch_maven_versions(group_id: str, artifact_id: str) -> List[str]:
-    """从 Maven Central 拉取版本列表。"""
+@functools.lru_cache(maxsize=2048)
+def _fetch_maven_versions_cached(group_id: str, artifact_id: str) -> Tuple[str, ...]:
+    """按 (groupId, artifactId) 缓存 Maven Central 版本列表（请求失败抛异常，不会被缓存）。"""
     query = f'g:"{group_id}" AND a:"{artifact_id}"'
     url = "https://search.maven.org/solrsearch/select"
     params = {
@@ -114,11 +217,15 @@ def fetch_maven_versions(group_id: str, artifact_id: str) -> List[str]:
         "rows": 200,
         "core": "gav",
     }
-    response = requests.get(url, params=params, timeout=30)
+    response = _HTTP_SESSION.get(url, params=params, timeout=30)
     response.raise_for_status()
     data = response.json()
-    versions = [doc["v"] for doc in data.get("response", {}).get("docs", [])]
-    return versions
+    return tuple(doc["v"] for doc in data.get("response", {}).get("docs", []))
+
+
+def fetch_maven_versions(group_id: str, artifact_id: str) -> List[str]:
+    """从 Maven Central 拉取版本列表（同一 Library 的多个 CVE 只请求一次）。"""
+    return list(_fetch_maven_versions_cached(group_id, artifact_id))
 
 
 def generate_candidate_versions(group_id: str, artifact_id: str, spec: VersionSpec) -> List[str]:
@@ -128,7 +235,8 @@ def generate_candidate_versions(group_id: str, artifact_id: str, spec: VersionSp
     if needs_query:
         try:
             versions = fetch_maven_versions(group_id, artifact_id)
-            filtered = [v for v in versions if version_satisfies(v, spec)]
+            parsed = [(raw, _version_key(raw)) for raw in versions]
+            filtered = [raw for raw, version_v in parsed if version_satisfies_v(raw, version_v, spec)]
             candidates.extend(filtered)
         except Exception as exc:
             logging.warning("  查询 Maven Central 失败: %s", exc)
@@ -136,115 +244,233 @@ def generate_candidate_versions(group_id: str, artifact_id: str, spec: VersionSp
     return unique
 
 
-def _extract_text(elem: Optional[ET.Element]) -> Optional[str]:
-    """提取 XML 文本内容。"""
-    if elem is None or elem.text is None:
-        return None
-    return elem.text.strip()
+@functools.lru_cache(maxsize=4096)
+def _parse_pom_cached(pom_path: str, stat_key: Tuple[int, int]) -> Dict[str, Dict[str, str]]:
+    """按 (路径, mtime_ns, size) 缓存 pom 解析结果，文件变化后自动失效；返回值为共享对象，调用方不得修改。"""
+    return _parse_pom(pom_path)
+
+
+def _load_pom(pom_path: str) -> Dict[str, Dict[str, str]]:
+    """读取 pom 解析结果，文件未变化时直接命中缓存。"""
+    stat = os.stat(pom_path)
+    return _parse_pom_cached(pom_path, (stat.st_mtime_ns, stat.st_size))
 
 
 def _parse_pom(pom_path: str) -> Dict[str, Dict[str, str]]:
     """解析单个 pom.xml，收集 properties 与 dependencyManagement。"""
-    tree = ET.parse(pom_path)
-    root = tree.getroot()
-    ns_match = re.match(r"\{(.+)\}", root.tag)
-    ns = ns_match.group(1) if ns_match else ""
-    nsmap = {"m": ns} if ns else {}
-
-    def find(path):
-        return root.find(path, nsmap)
-
-    def findall(path):
-        return root.findall(path, nsmap)
-
-    properties = {}
-    props = find("m:properties")
-    if props is not None:
-        for child in list(props):
-            key = child.tag.split("}")[-1]
-            value = child.text.strip() if child.text else ""
-            properties[key] = value
-
-    dep_mgmt = {}
-    dep_mgmt_node = find("m:dependencyManagement/m:dependencies")
-    if dep_mgmt_node is not None:
-        for dep in dep_mgmt_node.findall("m:dependency", nsmap):
-            gid = _extract_text(dep.find("m:groupId", nsmap))
-            aid = _extract_text(dep.find("m:artifactId", nsmap))
-            ver = _extract_text(dep.find("m:version", nsmap))
+    return _parse_pom_source(pom_path)
+
+
+def _iterparse(source):
+    if _HAS_LXML:
+        return ET.iterparse(
+            source, events=("start", "end"), remove_comments=True, remove_pis=True, resolve_entities=False
+        )
+    return ET.iterparse(source, events=("start", "end"))
+
+
+@functools.lru_cache(maxsize=1024)
+def _localname(tag) -> str:
+    """去掉 {namespace} 前缀；pom 中标签名种类很少，缓存后每个标签只切分一次。"""
+    return tag.rpartition("}")[2] if isinstance(tag, str) else ""
+
+
+def _child_texts(elem) -> Dict[str, Optional[str]]:
+    """收集元素各直接子节点的文本（同名子节点取第一个）。"""
+    texts: Dict[str, Optional[str]] = {}
+    for child in elem:
+        name = _localname(child.tag)
+        if name and name not in texts:
+            texts[name] = child.text.strip() if child.text is not None else None
+    return texts
+
+
+def _parse_pom_source(source) -> Dict[str, Dict[str, str]]:
+    """单次流式解析 pom（文件路径或二进制文件对象），收集 properties、dependencyManagement、
+    dependencies、parent 与 modules；按标签路径分发，处理完的节点立即清空以保持内存占用平稳。
+    """
+    properties: Dict[str, str] = {}
+    dep_mgmt: Dict[str, str] = {}
+    dependencies: List[Dict[str, Optional[str]]] = []
+    parent: Dict[str, Optional[str]] = {}
+    modules: List[str] = []
+
+    path: List[str] = []
+    for event, elem in _iterparse(source):
+        if event == "start":
+            path.append(_localname(elem.tag))
+            continue
+
+        depth = len(path)
+        if depth == 3 and path[1] == "properties":
+            properties[path[2]] = elem.text.strip() if elem.text else ""
+            elem.clear()
+        elif depth == 3 and path[1:] == ["dependencies", "dependency"]:
+            texts = _child_texts(elem)
+            dependencies.append({
+                "groupId": texts.get("groupId"),
+                "artifactId": texts.get("artifactId"),
+                "version": texts.get("version"),
+            })
+            elem.clear()
+        elif depth == 4 and path[1:] == ["dependencyManagement", "dependencies", "dependency"]:
+            texts = _child_texts(elem)
+            gid, aid, ver = texts.get("groupId"), texts.get("artifactId"), texts.get("version")
             if gid and aid and ver:
                 dep_mgmt[f"{gid}:{aid}"] = ver
-
-    dependencies = []
-    deps_node = find("m:dependencies")
-    if deps_node is not None:
-        for dep in deps_node.findall("m:dependency", nsmap):
-            gid = _extract_text(dep.find("m:groupId", nsmap))
-            aid = _extract_text(dep.find("m:artifactId", nsmap))
-            ver = _extract_text(dep.find("m:version", nsmap))
-            dependencies.append({"groupId": gid, "artifactId": aid, "version": ver})
-
-    parent = {}
-    parent_node = find("m:parent")
-    if parent_node is not None:
-        parent["groupId"] = _extract_text(parent_node.find("m:groupId", nsmap))
-        parent["artifactId"] = _extract_text(parent_node.find("m:artifactId", nsmap))
-        parent["version"] = _extract_text(parent_node.find("m:version", nsmap))
-        parent["relativePath"] = _extract_text(parent_node.find("m:relativePath", nsmap))
+            elem.clear()
+        elif depth == 3 and path[1:] == ["modules", "module"]:
+            if elem.text and elem.text.strip():
+                modules.append(elem.text.strip())
+        elif depth == 2 and path[1] == "parent" and not parent:
+            texts = _child_texts(elem)
+            for key in ["groupId", "artifactId", "version", "relativePath"]:
+                parent[key] = texts.get(key)
+        if depth == 2:
+            # project 的直接子节点处理完毕（含 build、reporting 等无关节点），释放其子树
+            elem.clear()
+        path.pop()
 
     return {
         "properties": properties,
         "dependencyManagement": dep_mgmt,
         "dependencies": dependencies,
         "parent": parent,
+        "modules": modules,
     }
 
 
+def probe_remote_pom(repo_full: str, group_id: str, artifact_id: str, timeout: int = 10) -> Optional[Dict[str, str]]:
+    """克隆前通过 raw.githubusercontent.com 读取根 pom.xml，预先解析目标依赖版本。
+
+    仅当根 pom 不含子模块、且能在其中直接解析出具体版本时返回依赖信息；
+    多模块项目、版本来自父 pom 或属性无法解析等无法下结论的情况返回 None，交由克隆后的完整解析处理。
+    """
+    url = f"https://raw.githubusercontent.com/{repo_full}/HEAD/pom.xml"
+    try:
+        response = _PROBE_SESSION.get(url, timeout=timeout)
+        if response.status_code != 200:
+            return None
+        parsed = _parse_pom_source(io.BytesIO(response.content))
+    except (requests.RequestException, ET.ParseError) as exc:
+        logging.debug("远程 pom 预检失败 %s: %s", repo_full, exc)
+        return None
+    if parsed["modules"]:
+        return None
+
+    for dep in parsed["dependencies"]:
+        if dep["groupId"] != group_id or dep["artifactId"] != artifact_id:
+            continue
+        version = dep.get("version")
+        resolved = _resolve_property(version, parsed["properties"])
+        source = "remote_pom_property" if resolved != version else "remote_pom_direct"
+        if not resolved:
+            resolved = parsed["dependencyManagement"].get(f"{group_id}:{artifact_id}")
+            source = "remote_dependencyManagement"
+        if not resolved or "${" in resolved:
+            return None
+        return {
+            "resolved_version": resolved,
+            "source": source,
+            "reason": f"通过远程根 pom 预检解析（{source}）",
+        }
+    return None
+
+
 def _resolve_property(value: Optional[str], properties: Dict[str, str]) -> Optional[str]:
-    """解析 ${xxx} 形式的 POM 属性引用。"""
-    if not value:
-        return value
-    match = re.match(r"\$\{([^}]+)\}", value)
-    if match:
-        key = match.group(1)
-        return properties.get(key, value)
+    """解析 ${xxx} 形式的 POM 属性引用，属性值本身仍是引用时继续展开（最多 _MAX_PROPERTY_DEPTH 层）。"""
+    for _ in range(_MAX_PROPERTY_DEPTH):
+        if not value or "${" not in value:
+            return value
+        match = _PROP_RE.match(value)
+        if not match or match.group(1) not in properties:
+            return value
+        value = properties[match.group(1)]
     return value
 
 
+def collect_pom_paths(repo_path: str) -> List[str]:
+    """收集仓库中所有 pom.xml 相对于仓库根目录的路径。"""
+    return [os.path.relpath(pom, repo_path) for pom in _collect_poms(repo_path)]
+
+
 def _collect_poms(repo_path: str) -> List[str]:
-    """收集仓库中的所有 pom.xml。"""
-    pom_files = []
-    for root, _, files in os.walk(repo_path):
-        for name in files:
-            if name == "pom.xml":
-                pom_files.append(os.path.join(root, name))
-    return pom_files
-
-
-def resolve_dependency_version(repo_path: str, group_id: str, artifact_id: str) -> Tuple[bool, Dict[str, str]]:
-    """解析依赖版本，静态解析失败时回退到 mvn dependency:tree。"""
-    pom_files = _collect_poms(repo_path)
+    """收集仓库中的所有 pom.xml，跳过版本控制、构建产物与 IDE 目录。"""
+    return list(iter_files(repo_path, lambda name: name == "pom.xml", POM_WALK_PRUNE_DIRS))
+
+
+def _hash_poms(repo_path: str, pom_files: List[str]) -> str:
+    """计算仓库内所有 pom.xml（相对路径 + 内容）的 SHA-256 摘要。"""
+    digest = hashlib.sha256()
+    for pom in sorted(pom_files):
+        digest.update(os.path.relpath(pom, repo_path).encode("utf-8"))
+        digest.update(b"\0")
+        with open(pom, "rb") as handle:
+            digest.update(handle.read())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def resolve_dependency_version(
+    repo_path: str,
+    group_id: str,
+    artifact_id: str,
+    cache=None,
+    maven_repo: Optional[str] = None,
+    pom_paths: Optional[List[str]] = None,
+) -> Tuple[bool, Dict[str, str]]:
+    """解析依赖版本，静态解析失败时回退到 mvn dependency:tree。
+
+    传入 cache（IntermediateCache）时，按 pom.xml 内容摘要与依赖坐标缓存解析结果，
+    pom 内容不变的重复运行可直接跳过解析；传入 pom_paths（相对路径）时不再遍历仓库查找 pom.xml。
+    """
+    if pom_paths is None:
+        pom_files = _collect_poms(repo_path)
+    else:
+        pom_files = [os.path.join(repo_path, path) for path in pom_paths]
     if not pom_files:
         return False, {}
 
+    cache_key = None
+    if cache is not None:
+        try:
+            cache_key = f"{_hash_poms(repo_path, pom_files)}.{group_id}_{artifact_id}"
+        except OSError as exc:
+            logging.warning("计算 pom 摘要失败: %s", exc)
+        if cache_key:
+            cached = cache.load_pom_resolution(cache_key)
+            if cached:
+                return True, cached
+
+    dep_info = _resolve_from_poms(repo_path, pom_files, group_id, artifact_id, maven_repo)
+    # 只缓存成功解析的结果，解析失败（例如 mvn 临时不可用）下次仍会重试
+    if cache_key and dep_info.get("resolved_version"):
+        cache.save_pom_resolution(cache_key, dep_info)
+    return True, dep_info
+
+
+def _resolve_from_poms(
+    repo_path: str, pom_files: List[str], group_id: str, artifact_id: str, maven_repo: Optional[str] = None
+) -> Dict[str, str]:
+    """基于已收集的 pom.xml 列表解析依赖版本。"""
     combined_properties: Dict[str, str] = {}
     combined_dep_mgmt: Dict[str, str] = {}
 
+    # 每个 pom 只解析一次：先汇总 properties/dependencyManagement，再在内存中查找依赖
+    parsed_poms = []
     for pom in pom_files:
         try:
-            parsed = _parse_pom(pom)
-            combined_properties.update(parsed["properties"])
-            combined_dep_mgmt.update(parsed["dependencyManagement"])
+            parsed = _load_pom(pom)
         except Exception as exc:
             logging.warning("解析 %s 失败: %s", pom, exc)
+            continue
+        combined_properties.update(parsed["properties"])
+        combined_dep_mgmt.update(parsed["dependencyManagement"])
+        parsed_poms.append(parsed)
 
     target_key = f"{group_id}:{artifact_id}"
 
-    for pom in pom_files:
-        try:
-            parsed = _parse_pom(pom)
-        except Exception:
-            continue
+    for parsed in parsed_poms:
         for dep in parsed["dependencies"]:
             if dep["groupId"] == group_id and dep["artifactId"] == artifact_id:
                 version = dep.get("version")
@@ -257,7 +483,7 @@ def resolve_dependency_version(repo_path: str, group_id: str, artifact_id: str)
                     if resolved:
                         source = "dependencyManagement"
                 if resolved:
-                    return True, {
+                    return {
                         "resolved_version": resolved,
                         "source": source,
                         "reason": f"通过 {source} 解析",
@@ -265,39 +491,112 @@ def resolve_dependency_version(repo_path: str, group_id: str, artifact_id: str)
 
     # fallback to dependencyManagement only
     if target_key in combined_dep_mgmt:
-        return True, {
+        return {
             "resolved_version": combined_dep_mgmt[target_key],
             "source": "dependencyManagement",
             "reason": "通过 dependencyManagement 解析",
         }
 
     # dynamic fallback
-    mvn_output = _run_dependency_tree(repo_path, group_id, artifact_id)
-    if mvn_output:
-        match = re.search(rf"{re.escape(group_id)}:{re.escape(artifact_id)}:[^:]+:([^:]+):", mvn_output)
-        if match:
-            return True, {
-                "resolved_version": match.group(1),
-                "source": "mvn_dependency_tree",
-                "reason": "通过 mvn dependency:tree 解析",
-            }
-
-    return True, {
+    tree_version = _dependency_tree_versions(repo_path, pom_files, maven_repo).get((group_id, artifact_id))
+    if tree_version:
+        return {
+            "resolved_version": tree_version,
+            "source": "mvn_dependency_tree",
+            "reason": "通过 mvn dependency:tree 解析",
+        }
+
+    return {
         "resolved_version": None,
         "source": "unknown",
         "reason": "无法解析依赖版本",
     }
 
 
-def _run_dependency_tree(repo_path: str, group_id: str, artifact_id: str) -> Optional[str]:
-    """执行 mvn dependency:tree 并返回输出。"""
-    cmd = ["mvn", "-q", "-DskipTests", "dependency:tree", f"-Dincludes={group_id}:{artifact_id}"]
+def _dependency_tree_versions(
+    repo_path: str, pom_files: List[str], maven_repo: Optional[str] = None
+) -> Dict[Tuple[str, str], str]:
+    """返回仓库完整依赖树中各 (groupId, artifactId) 的版本，同一仓库的多个坐标共用一次 mvn 调用。"""
+    signature = []
+    for pom in sorted(pom_files):
+        try:
+            stat = os.stat(pom)
+            signature.append((pom, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((pom, None, None))
+    signature = tuple(signature)
+    key = (os.path.abspath(repo_path), signature)
+    with _DEP_TREE_LOCKS_GUARD:
+        versions = _cached_dependency_tree(key)
+        if versions is not None:
+            return versions
+        lock = _DEP_TREE_LOCKS.setdefault(key, threading.Lock())
+    with lock:
+        with _DEP_TREE_LOCKS_GUARD:
+            versions = _cached_dependency_tree(key)
+        if versions is not None:
+            # 等锁期间已由其它线程算好
+            return versions
+        try:
+            versions = {}
+            mvn_output = _run_dependency_tree(repo_path, maven_repo)
+            for group_id, artifact_id, version in _DEP_TREE_LINE_RE.findall(mvn_output or ""):
+                # 与依赖树中首次出现的版本保持一致（最近优先）
+                versions.setdefault((group_id, artifact_id), version)
+            # 执行失败也缓存空结果，避免同一仓库的其它坐标重复启动 JVM
+            with _DEP_TREE_LOCKS_GUARD:
+                _DEP_TREE_CACHE[key] = versions
+                while len(_DEP_TREE_CACHE) > _DEP_TREE_CACHE_SIZE:
+                    _DEP_TREE_CACHE.popitem(last=False)
+        finally:
+            with _DEP_TREE_LOCKS_GUARD:
+                if _DEP_TREE_LOCKS.get(key) is lock:
+                    del _DEP_TREE_LOCKS[key]
+    return versions
+
+
+def _cached_dependency_tree(key: Tuple[str, Tuple]) -> Optional[Dict[Tuple[str, str], str]]:
+    """查询依赖树缓存并标记为最近使用，调用方需持有 _DEP_TREE_LOCKS_GUARD。"""
+    versions = _DEP_TREE_CACHE.get(key)
+    if versions is not None:
+        _DEP_TREE_CACHE.move_to_end(key)
+    return versions
+
+
+def _offline_tree_possible(maven_repo: Optional[str] = None) -> bool:
+    """本地仓库已缓存 maven-dependency-plugin 时离线执行才可能成功（冷仓库直接联网，省去一次 JVM 启动）。"""
+    local_repo = maven_repo or os.path.join(os.path.expanduser("~"), ".m2", "repository")
+    return os.path.isdir(os.path.join(local_repo, "org", "apache", "maven", "plugins", "maven-dependency-plugin"))
+
+
+def _run_dependency_tree(repo_path: str, maven_repo: Optional[str] = None) -> Optional[str]:
+    """执行一次完整的 mvn dependency:tree 并返回文本输出；本地仓库已预热时先离线执行，依赖未就绪时再联网重试。"""
+    fd, output_file = tempfile.mkstemp(prefix="dependency_tree_", suffix=".txt")
+    os.close(fd)
+    modes = (True, False) if _offline_tree_possible(maven_repo) else (False,)
+    env = maven_env()
     try:
-        result = subprocess.run(cmd, cwd=repo_path, capture_output=True, text=True, timeout=120)
-    except Exception as exc:
-        logging.warning("执行 mvn dependency:tree 失败: %s", exc)
-        return None
-    if result.returncode != 0:
-        logging.warning("mvn dependency:tree 执行失败: %s", result.stderr[-200:])
+        for offline in modes:
+            cmd = ["mvn", "-q", "-DskipTests", "dependency:tree", f"-DoutputFile={output_file}", "-DappendOutput=true"]
+            if offline:
+                cmd.insert(1, "-o")
+            if maven_repo:
+                cmd.append(f"-Dmaven.repo.local={maven_repo}")
+            # 多模块项目各模块追加写入同一文件，每次执行前清空
+            open(output_file, "w").close()
+            try:
+                result = run_command(cmd, cwd=repo_path, timeout=120, env=env)
+            except Exception as exc:
+                logging.warning("执行 mvn dependency:tree 失败: %s", exc)
+                return None
+            if result.returncode == 0:
+                with open(output_file, "r", encoding="utf-8", errors="replace") as handle:
+                    return handle.read()
+            if not offline:
+                logging.warning("mvn dependency:tree 执行失败: %s", result.stderr[-200:])
         return None
-    return result.stdout
\ No newline at end of file
+    finally:
+        try:
+            os.remove(output_file)
+        except OSError:
+            pass
@@ -1,36 +1,137 @@
 """输入解析模块：兼容 JSON 数组与 JSONL。"""
 
-import json
+import io
 import logging
+import mmap
+from collections import Counter
+from typing import BinaryIO, Dict, Iterator, List
 
+import orjson
 
-def load_vuln_records(path: str):
-    """加载漏洞记录，字段缺失时输出警告。"""
-    records = []
-    with open(path, "r", encoding="utf-8") as handle:
-        content = handle.read().strip()
-        if not content:
-            return []
+try:
+    import ijson
+except ImportError:  # ijson 为可选依赖，缺失时 JSON 数组整体加载
+    ijson = None
+
+# JSONL 每次读取的块大小；文件句柄使用 1 MiB 缓冲，减少 read 系统调用
+_READ_CHUNK_BYTES = 256 * 1024
+_READ_BUFFER_BYTES = 1 << 20
+
+REQUIRED_KEYS = ("CVE_Number", "CVE_Library", "CVE_Library_version", "CVE_Class", "CVE_Method")
+_REQUIRED_KEY_SET = frozenset(REQUIRED_KEYS)
+
+
+def _check_record(record: Dict, missing_counts: Counter, samples: Dict[str, str]) -> Dict:
+    """统计缺失字段（每个字段记录首个样例 CVE），由调用方在读取结束后汇总输出一次。"""
+    # 常见情况字段齐全，一次 C 层集合判断即可返回
+    if _REQUIRED_KEY_SET.issubset(record):
+        return record
+    for key in REQUIRED_KEYS:
+        if key not in record:
+            missing_counts[key] += 1
+            samples.setdefault(key, record.get("CVE_Number", "UNKNOWN"))
+    return record
+
+
+def _iter_json_lines(handle: BinaryIO) -> Iterator[Dict]:
+    """按块读取 JSONL：块内用 find 逐行切分，只保留末尾未完成的半行，跨块时才拼接。"""
+    tail: List[bytes] = []
+    while True:
+        chunk = handle.read(_READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        end = chunk.rfind(b"\n")
+        if end == -1:
+            tail.append(chunk)
+            continue
+        data = b"".join(tail) + chunk[:end] if tail else chunk[:end]
+        tail = [chunk[end + 1:]] if end + 1 < len(chunk) else []
+        yield from _parse_lines(data)
+    if tail:
+        yield from _parse_lines(b"".join(tail))
+
+
+def _parse_lines(data: bytes) -> Iterator[Dict]:
+    start = 0
+    while start <= len(data):
+        end = data.find(b"\n", start)
+        if end == -1:
+            end = len(data)
+        line = data[start:end]
+        start = end + 1
+        if line.strip():
+            yield orjson.loads(line)
+
+
+def _iter_json_array(handle: BinaryIO) -> Iterator[Dict]:
+    if ijson is not None:
+        yield from ijson.items(handle, "item")
+        return
+    data = _load_json_mapped(handle)
+    if isinstance(data, list):
+        yield from data
+    else:
+        logging.warning("输入的 JSON 不是数组格式")
+        yield data
+
+
+def _load_json_mapped(handle: BinaryIO):
+    """把整个文件 mmap 后交给 orjson 解析，直接读取页缓存，不再额外复制一份文件内容；无法 mmap 时回退为 read()。"""
+    try:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, io.UnsupportedOperation):
+        return orjson.loads(handle.read())
+    with mapped, memoryview(mapped) as view:
+        return orjson.loads(view)
+
+
+def _peek_first_char(handle: BinaryIO) -> bytes:
+    """按 64 字节前缀跳过前导空白，返回首个有效字节并将读取位置回退到该字节处。"""
+    pos = handle.tell()
+    while True:
+        prefix = handle.read(64)
+        if not prefix:
+            return b""
+        stripped = prefix.lstrip()
+        if stripped:
+            handle.seek(pos + len(prefix) - len(stripped))
+            return stripped[:1]
+        pos += len(prefix)
+
+
+def iter_vuln_records(path: str) -> Iterator[Dict]:
+    """逐条读取漏洞记录（流式），字段缺失时在读取结束后输出一条汇总警告。
+
+    以二进制方式读取，orjson/ijson 直接解析 UTF-8 字节，省去解码为 str 的开销。
+    """
+    with open(path, "rb", buffering=_READ_BUFFER_BYTES) as handle:
+        if path.endswith(".jsonl"):
+            records = _iter_json_lines(handle)
+        else:
+            first = _peek_first_char(handle)
+            if not first:
+                return
+            records = _iter_json_array(handle) if first == b"[" else _iter_json_lines(handle)
+        missing_counts: Counter = Counter()
+        samples: Dict[str, str] = {}
         try:
-            if content.startswith("["):
-                data = json.loads(content)
-                if isinstance(data, list):
-                    records = data
-                else:
-                    logging.warning("输入的 JSON 不是数组格式")
-                    records = [data]
-            else:
-                for line in content.splitlines():
-                    line = line.strip()
-                    if not line:
-                        continue
-                    records.append(json.loads(line))
-        except json.JSONDecodeError as exc:
+            if not logging.getLogger().isEnabledFor(logging.WARNING):
+                # 警告不会输出时，字段检查没有任何效果，直接跳过
+                yield from records
+                return
+            for record in records:
+                yield _check_record(record, missing_counts, samples)
+        except ValueError as exc:  # orjson.JSONDecodeError / ijson.JSONError 均为 ValueError 子类
             logging.error("解析输入文件失败: %s", exc)
-            return []
+        finally:
+            if missing_counts:
+                logging.warning(
+                    "记录缺少字段（字段: 缺失条数）: %s，样例 CVE: %s",
+                    dict(missing_counts),
+                    samples,
+                )
 
-    for record in records:
-        for key in ["CVE_Number", "CVE_Library", "CVE_Library_version", "CVE_Class", "CVE_Method"]:
-            if key not in record:
-                logging.warning("记录中缺少字段 %s: %s", key, record.get("CVE_Number", "UNKNOWN"))
-    return records
\ No newline at end of file
+
+def load_vuln_records(path: str) -> List[Dict]:
+    """加载漏洞记录，字段缺失时输出警告。"""
+    return list(iter_vuln_records(path))
@@ -1,12 +1,43 @@
-"""基础工具函数：日志、目录与 JSONL 输出。"""
+"""基础工具函数：日志、目录、子进程、HTTP 会话与 JSONL 输出。"""
 
-import json
 import logging
 import os
-from typing import Iterable
+import signal
+import subprocess
+import threading
+from typing import Callable, Dict, Iterable, Iterator, Optional, Sequence
 
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
-def setup_logger():
+
+# 多个 Library 组并发处理时共用同一个输出文件，需要串行化追加写入
+_APPEND_LOCK = threading.Lock()
+
+# ensure_dir 已确认存在的目录（set 的 in/add 在 GIL 下原子，多线程共用无需加锁）
+_ENSURED_DIRS = set()
+
+# write_jsonl 攒够该字节数再写一次文件
+_JSONL_CHUNK_BYTES = 1 << 20
+# OPT_APPEND_NEWLINE 由 orjson 在 C 层直接追加换行，无需再拼接 b"\n"
+_JSONL_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+
+# JSONL 写入的持久化策略：
+#   none        不主动 fsync，交给操作系统回写（最快，崩溃时可能丢失最近写入）
+#   fsync_end   写完/关闭时 fsync 一次
+#   fsync_every 每次把缓冲写入文件后都 fsync（组提交：一次 fsync 覆盖一批记录）
+DURABILITY_MODES = ("none", "fsync_end", "fsync_every")
+
+
+def _check_durability(durability: str) -> str:
+    if durability not in DURABILITY_MODES:
+        raise ValueError(f"未知的 durability: {durability}，可选 {DURABILITY_MODES}")
+    return durability
+
+
+def setup_logger() -> None:
     """初始化日志格式与级别。"""
     logging.basicConfig(
         level=logging.INFO,
@@ -15,20 +46,199 @@ def setup_logger():
 
 
 def ensure_dir(path: str) -> None:
-    """确保目录存在。"""
+    """确保目录存在；已确认过的路径直接返回，不再发起 stat/mkdir 系统调用（不适用于随后可能被删除的目录）。"""
+    if path in _ENSURED_DIRS:
+        return
     os.makedirs(path, exist_ok=True)
+    _ENSURED_DIRS.add(path)
+
 
+def iter_files(root: str, match: Callable[[str], bool], prune_dirs: Iterable[str] = ()) -> Iterator[str]:
+    """用 os.scandir 非递归遍历目录树，产出文件名满足 match 的文件路径。
+
+    DirEntry 自带类型缓存且直接给出完整路径，不跟随符号链接，名称在 prune_dirs 中的目录不进入。
+    """
+    prune = frozenset(prune_dirs)
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in prune:
+                            stack.append(entry.path)
+                    elif match(entry.name) and entry.is_file(follow_symlinks=False):
+                        yield entry.path
+        except OSError:
+            continue
+
+
+def kill_process_group(pid: int) -> None:
+    """结束整个进程组（含 mvn 派生的 JVM 等孙进程）。"""
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def run_command(
+    cmd: Sequence[str], cwd: Optional[str] = None, timeout: float = 300, env: Optional[Dict[str, str]] = None
+) -> subprocess.CompletedProcess:
+    """在独立进程组中执行命令，超时时结束整个进程组后抛出 TimeoutExpired。"""
+    proc = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        start_new_session=True,
+    )
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_process_group(proc.pid)
+        proc.communicate()
+        raise
+    except BaseException:
+        kill_process_group(proc.pid)
+        proc.wait()
+        raise
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+
+def make_http_session(pool_size: int = 20, retries: int = 6, backoff_factor: float = 1.5) -> requests.Session:
+    """创建带重试的 HTTP 会话：对连接错误、429 与 5xx 指数退避加抖动，并遵守 Retry-After。"""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        backoff_jitter=1.0,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+        # 重试耗尽后返回最后一次响应，由调用方按状态码处理
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
-def write_jsonl(path: str, records: Iterable[dict]) -> None:
-    """写入 JSONL 结果文件。"""
-    with open(path, "w", encoding="utf-8") as handle:
+
+def _jsonl_line(record: dict) -> bytes:
+    """序列化为一行 JSONL（UTF-8 字节，非 ASCII 字符不转义）。"""
+    return orjson.dumps(record, option=_JSONL_OPTS)
+
+
+def _write_all(fd: int, data) -> None:
+    """把整个缓冲写入文件描述符，处理 os.write 的部分写入。"""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def write_jsonl(path: str, records: Iterable[dict], durability: str = "fsync_end") -> None:
+    """写入 JSONL 结果文件：在内存中拼接成块，每满 _JSONL_CHUNK_BYTES 才直接 os.write 一次，不经过 io 缓冲层。"""
+    _check_durability(durability)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        buffer = bytearray()
+        # 循环内用到的函数与常量绑定为局部变量，省去每条记录的全局/属性查找
+        dumps, option, extend, chunk_bytes = orjson.dumps, _JSONL_OPTS, buffer.extend, _JSONL_CHUNK_BYTES
         for record in records:
-            handle.write(json.dumps(record, ensure_ascii=False))
-            handle.write("\n")
+            extend(dumps(record, option=option))
+            if len(buffer) >= chunk_bytes:
+                _write_all(fd, buffer)
+                buffer.clear()
+                if durability == "fsync_every":
+                    os.fsync(fd)
+        if buffer:
+            _write_all(fd, buffer)
+        if durability != "none":
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class JsonlWriter:
+    """长期持有的 JSONL 追加写入器：多线程共用一个文件句柄，记录先攒在内存缓冲中，
+    满 flush_every 条或 flush_bytes 字节时一次写出；关闭时写出剩余内容。
+
+    durability 见 DURABILITY_MODES：fsync_every 在每次写出缓冲后 fsync，flush_every/flush_bytes
+    即组提交的批大小，批越大 fsync 越少、崩溃时可能丢失的记录越多。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "a",
+        flush_every: int = 50,
+        buffering: int = 1 << 16,
+        flush_bytes: int = _JSONL_CHUNK_BYTES,
+        durability: str = "fsync_end",
+    ):
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.flush_bytes = max(1, flush_bytes)
+        self.durability = _check_durability(durability)
+        self._handle = open(path, mode if "b" in mode else mode + "b", buffering=buffering)
+        self._lock = threading.Lock()
+        self._buffer = bytearray()
+        self._pending = 0
+
+    def write(self, record: dict) -> None:
+        line = _jsonl_line(record)
+        with self._lock:
+            self._buffer += line
+            self._pending += 1
+            if self._pending >= self.flush_every or len(self._buffer) >= self.flush_bytes:
+                self._flush_locked()
+
+    # 与 append_jsonl 的调用习惯保持一致
+    append = write
+
+    def flush(self) -> None:
+        """立即写出缓冲中的记录。"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._buffer:
+            self._handle.write(self._buffer)
+            self._buffer.clear()
+            self._handle.flush()
+            if self.durability == "fsync_every":
+                os.fsync(self._handle.fileno())
+        self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle.closed:
+                return
+            self._flush_locked()
+            if self.durability == "fsync_end":
+                os.fsync(self._handle.fileno())
+            self._handle.close()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
 
+def append_jsonl(path: str, record: dict, durability: str = "none") -> None:
+    """追加单条记录到 JSONL 文件（线程安全）；每次调用都会打开文件，循环中应改用 JsonlWriter。
 
-def append_jsonl(path: str, record: dict) -> None:
-    """追加单条记录到 JSONL 文件。"""
-    with open(path, "a", encoding="utf-8") as handle:
-        handle.write(json.dumps(record, ensure_ascii=False))
-        handle.write("\n")
+    durability 为 fsync_end 或 fsync_every 时，本条记录写入后即 fsync。
+    """
+    _check_durability(durability)
+    line = _jsonl_line(record)
+    with _APPEND_LOCK:
+        with open(path, "ab") as handle:
+            handle.write(line)
+            if durability != "none":
+                handle.flush()
+                os.fsync(handle.fileno())
@@ -0,0 +1,49 @@
+"""detector 方法调用词法扫描的回归测试。"""
+
+import unittest
+
+from src.detector import _parse_invocations
+
+
+def _members(source: str):
+    return [member for _, member in _parse_invocations(source)]
+
+
+class ParseInvocationsTest(unittest.TestCase):
+    """比较、移位与三元运算符之后的调用不能被当作泛型参数丢弃。"""
+
+    def test_call_after_comparison(self):
+        source = "class A { void f() { if (a > foo()) {} } }"
+        self.assertEqual(_members(source), ["foo"])
+
+    def test_call_after_shift(self):
+        source = "class A { void f() { int s = a >> shl(1); int u = a >>> ushr(2); } }"
+        self.assertEqual(_members(source), ["shl", "ushr"])
+
+    def test_call_in_ternary(self):
+        source = "class A { void f() { int x = y > bar() ? 2 : 3; baz(); } }"
+        self.assertEqual(_members(source), ["bar", "baz"])
+
+    def test_explicit_type_arguments(self):
+        source = "class A { void f() { List<String> l = Collections.<String>emptyList(); } }"
+        self.assertEqual(_parse_invocations(source), (("Collections", "emptyList"),))
+
+    def test_generic_method_declaration_is_not_a_call(self):
+        source = "class A { List<String> g() { return null; } Map<K, List<V>> h() throws E { return null; } }"
+        self.assertEqual(_members(source), [])
+
+    def test_interface_method_with_generic_return_is_not_a_call(self):
+        source = "interface R { List<String> parse(String s); }"
+        self.assertEqual(_parse_invocations(source), ())
+
+    def test_abstract_method_declaration_is_not_a_call(self):
+        source = "abstract class A { abstract Map<K, V> load(); abstract String name(); int x = init(); }"
+        self.assertEqual(_members(source), ["init"])
+
+    def test_enum_constants_are_not_calls(self):
+        source = "enum E { PARSE(1), LOAD(code()) { void f() { bar(); } }; E(int c) { check(c); } }"
+        self.assertEqual(_members(source), ["code", "bar", "check"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+"""main 中克隆前仓库筛选的回归测试。"""
+
+import argparse
+import os
+import tempfile
+import unittest
+
+from main import reject_oversized_repos
+from src.builder import MAX_REPO_SIZE_MB
+from src.intermediate import IntermediateCache
+
+
+class _Store:
+    """只提供 path() 的共享仓库存储替身，指向不存在的目录。"""
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+
+    def path(self, repo_full):
+        return os.path.join(self.base_dir, repo_full.replace("/", "__"))
+
+
+class RejectOversizedReposTest(unittest.TestCase):
+    """缺少 size 或 size 非整数的仓库不应被拒绝，超限的仓库应被标记为已删除。"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        base = self._tmp.name
+        self.cache = IntermediateCache(os.path.join(base, "intermediate"))
+        self.store = _Store(os.path.join(base, "store"))
+        self.args = argparse.Namespace(workdir=os.path.join(base, "work"))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_missing_size_is_not_rejected(self):
+        oversized_kb = (MAX_REPO_SIZE_MB + 1) * 1024
+        repos = [
+            {"full_name": "big/repo", "size": oversized_kb},
+            {"full_name": "unknown/repo"},
+            {"full_name": "odd/repo", "size": str(oversized_kb)},
+        ]
+        records = [{"CVE_Number": "CVE-2020-0001"}]
+
+        reject_oversized_repos(repos, records, self.store, self.args, self.cache)
+
+        big = self.cache.load_clone_status("CVE-2020-0001", "big/repo")
+        self.assertEqual(big["status"], "deleted")
+        self.assertIsNone(self.cache.load_clone_status("CVE-2020-0001", "unknown/repo"))
+        self.assertIsNone(self.cache.load_clone_status("CVE-2020-0001", "odd/repo"))
+
+
+if __name__ == "__main__":
+    unittest.main()